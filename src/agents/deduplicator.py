@@ -0,0 +1,194 @@
+import hashlib
+import logging
+import re
+import threading
+from urllib.parse import urlparse
+
+import numpy as np
+
+from config import DEDUP_SIMILARITY_THRESHOLD
+from models.content import ContentItem
+from services.youtube import parse_video_id
+
+logger = logging.getLogger(__name__)
+
+SHINGLE_SIZE = 4
+# Shorter fingerprints ("parte 2", a one-line boilerplate) say nothing about the content
+MIN_SHINGLES = 8
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16  # 16 bands x 4 rows: pairs above ~0.5 similarity become candidates
+
+_rng = np.random.default_rng(20240611)
+_PERM_A = _rng.integers(1, 2**63, size=(NUM_PERMUTATIONS, 1), dtype=np.uint64) | np.uint64(1)
+_PERM_B = _rng.integers(0, 2**63, size=(NUM_PERMUTATIONS, 1), dtype=np.uint64)
+
+_METRIC_FIELDS = ("views", "likes", "comments", "shares")
+
+
+def canonical_url(url: str) -> str:
+    """Normalize a content URL so different links to the same post compare equal."""
+    if not url:
+        return ""
+
+    parsed = urlparse(url.strip())
+    host = (parsed.hostname or "").lower()
+    host = re.sub(r"^(www|m|mobile)\.", "", host)
+    path = parsed.path.rstrip("/")
+
+    if host in ("youtube.com", "youtu.be"):
+        video_id = parse_video_id(url)
+        if video_id:
+            return f"youtube.com/watch?v={video_id}"
+    if host == "instagram.com":
+        path = re.sub(r"^/(reel|reels|tv)/", "/p/", path)
+
+    return f"{host}{path}"
+
+
+def _fingerprint_text(item: ContentItem) -> str:
+    text = f"{item.description or ''} {item.transcript or ''}".lower()
+    text = re.sub(r"https?://\S+|[#@]\w+", " ", text)
+    return " ".join(re.findall(r"\w+", text))
+
+
+def _minhash(text: str) -> np.ndarray | None:
+    words = text.split()
+    shingles = {" ".join(words[i : i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    if len(shingles) < MIN_SHINGLES:
+        return None
+
+    hashes = np.fromiter(
+        (
+            int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "little")
+            for s in shingles
+        ),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    # Universal hashing mod 2**64 (uint64 overflow wraps), one row per permutation
+    return (_PERM_A * hashes + _PERM_B).min(axis=1)
+
+
+def _merge_metrics(kept: ContentItem, duplicate: ContentItem, same_post: bool) -> ContentItem:
+    """Combine engagement of two copies.
+
+    The same post reached through two URLs keeps the highest counters; a cross-post
+    (same content, different post) adds them up since each copy has its own audience.
+    """
+    update = {}
+    for field in _METRIC_FIELDS:
+        a, b = getattr(kept, field), getattr(duplicate, field)
+        if a is None or b is None:
+            update[field] = a if b is None else b
+        else:
+            update[field] = max(a, b) if same_post else a + b
+    return kept.model_copy(update=update)
+
+
+class ContentDeduplicator:
+    """Collapses duplicate items across sources as they are added.
+
+    Items match on canonical URL, or on a MinHash fingerprint of description +
+    transcript whose estimated Jaccard similarity reaches ``threshold``. Fingerprints
+    only match across sources (an account never cross-posts to itself, and its posts
+    often share boilerplate) and need at least MIN_SHINGLES shingles. Thread-safe,
+    so it can filter a stream fed by concurrent extractions.
+
+    The kept copy is the one from the earliest source in ``source_order`` (sources
+    not listed rank last, ties keep the first seen), so it does not depend on the
+    order concurrent extractions deliver items in. Copies replaced by a preferred
+    one under another URL are listed in ``superseded``.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEDUP_SIMILARITY_THRESHOLD,
+        source_order: list[str] | None = None,
+    ):
+        self.threshold = threshold
+        self.items: list[ContentItem] = []
+        self.superseded: list[ContentItem] = []
+        self.duplicates = 0
+        self._rank = {source: rank for rank, source in reversed(list(enumerate(source_order or [])))}
+        self._by_url: dict[str, int] = {}
+        self._signatures: list[np.ndarray | None] = []
+        self._sources: list[str] = []
+        self._buckets: dict[tuple[int, bytes], list[int]] = {}
+        self._lock = threading.Lock()
+
+    def _source_rank(self, source: str) -> int:
+        return self._rank.get(source, len(self._rank))
+
+    def _find_similar(self, signature: np.ndarray, source: str) -> int | None:
+        rows = NUM_PERMUTATIONS // LSH_BANDS
+        candidates = set()
+        for band in range(LSH_BANDS):
+            key = (band, signature[band * rows : (band + 1) * rows].tobytes())
+            candidates.update(self._buckets.get(key, ()))
+        for index in sorted(candidates):
+            if self._sources[index] == source:
+                continue
+            similarity = float(np.mean(self._signatures[index] == signature))
+            if similarity >= self.threshold:
+                return index
+        return None
+
+    def _register(self, index: int, url: str, signature: np.ndarray | None) -> None:
+        if url:
+            self._by_url[url] = index
+        if signature is not None:
+            rows = NUM_PERMUTATIONS // LSH_BANDS
+            for band in range(LSH_BANDS):
+                key = (band, signature[band * rows : (band + 1) * rows].tobytes())
+                self._buckets.setdefault(key, []).append(index)
+
+    def add(self, item: ContentItem, source: str = "") -> ContentItem:
+        """Add an item extracted from ``source`` (e.g. the account URL).
+
+        Returns the item as now stored: ``item`` itself if it is new, otherwise the
+        preferred copy of its duplicates, with the combined metrics.
+        """
+        url = canonical_url(item.url)
+        signature = _minhash(_fingerprint_text(item))
+
+        with self._lock:
+            match = self._by_url.get(url) if url else None
+            same_post = match is not None
+            if match is None and signature is not None:
+                match = self._find_similar(signature, source)
+
+            if match is not None:
+                kept = self.items[match]
+                if self._source_rank(source) < self._source_rank(self._sources[match]):
+                    if item.url != kept.url:
+                        self.superseded.append(kept)
+                    kept, item = item, kept
+                    self._sources[match] = source
+                self.items[match] = _merge_metrics(kept, item, same_post)
+                self.duplicates += 1
+                if url and not same_post:
+                    self._by_url[url] = match
+                return self.items[match]
+
+            index = len(self.items)
+            self.items.append(item)
+            self._signatures.append(signature)
+            self._sources.append(source)
+            self._register(index, url, signature)
+            return item
+
+
+def deduplicate_items(items: list[ContentItem], sources: list[str] | None = None) -> list[ContentItem]:
+    """Return ``items`` with duplicates collapsed, keeping first-seen order.
+
+    ``sources`` gives the source of each item; without it only URL duplicates collapse.
+    """
+    deduplicator = ContentDeduplicator(source_order=list(dict.fromkeys(sources or [])))
+    for item, source in zip(items, sources or [""] * len(items)):
+        deduplicator.add(item, source)
+    if deduplicator.duplicates:
+        logger.info(
+            "Collapsed %d duplicate item(s): %d -> %d",
+            deduplicator.duplicates, len(items), len(deduplicator.items),
+        )
+    return deduplicator.items
@@ -1,12 +1,24 @@
 import logging
 import re
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from datetime import datetime, timezone
 from urllib.parse import urlparse
 
-from config import DEFAULT_EXTRACTION_LIMIT
+from config import (
+    DEFAULT_EXTRACTION_LIMIT,
+    EXTRACTION_CONCURRENCY,
+    INCREMENTAL_EXTRACTION,
+    YOUTUBE_METADATA_WORKERS,
+    YOUTUBE_VIDEO_TIMEOUT,
+)
 from models.content import ContentItem, ExtractionResult
-from services.apify import scrape_instagram, scrape_tiktok
-from services.youtube import get_channel_videos, get_video_metadata
+from services.apify import scrape_instagram, scrape_profiles, scrape_tiktok
+from services.extraction_state import load_account, save_account
+from services.http import get_stats as get_http_stats
+from services.youtube import get_channel_videos, get_video_metadata, parse_video_id
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +42,8 @@ def extract_username(url: str, platform: str) -> str:
     path = parsed.path.strip("/")
 
     if platform == "youtube":
+        # Drop channel tab suffixes so ".../@name/videos" maps to the same account as ".../@name"
+        path = re.sub(r"/(videos|shorts|streams|featured|playlists)$", "", path)
         match = re.match(r"@?([\w.-]+)", path.split("/")[-1] if "/" in path else path)
         return match.group(0) if match else path
 
@@ -77,21 +91,196 @@ def run_text_extractor(description: str, username: str, platform: str) -> Extrac
     )
 
 
-def run_extractor(url: str, limit: int = DEFAULT_EXTRACTION_LIMIT) -> ExtractionResult:
+def run_extractor(
+    url: str,
+    limit: int = DEFAULT_EXTRACTION_LIMIT,
+    incremental: bool = INCREMENTAL_EXTRACTION,
+    on_item: Callable[[ContentItem], None] | None = None,
+) -> ExtractionResult:
+    """Extract the latest content of a YouTube channel/video or an IG/TikTok profile.
+
+    ``on_item`` is called with every item of the final result as soon as it is
+    available, so callers can start processing before extraction finishes.
+    """
     platform = detect_platform(url)
     username = extract_username(url, platform)
 
-    logger.info("Extracting %s content for @%s (limit=%d)", platform, username, limit)
+    # Single-video URLs have no account to keep a watermark for
+    if platform == "youtube" and parse_video_id(url):
+        incremental = False
+
+    watermark, stored_items = _load_account_items(platform, username, limit, incremental)
 
     if platform == "youtube":
-        items = _extract_youtube(url, limit)
+        known_ids = {parse_video_id(item.url) for item in stored_items}
+        items = _extract_youtube(url, limit, known_ids, on_item)
     elif platform == "instagram":
-        items = _extract_instagram(username, limit)
+        items = _extract_instagram(username, limit, watermark, on_item)
     elif platform == "tiktok":
-        items = _extract_tiktok(username, limit)
+        items = _extract_tiktok(username, limit, watermark, on_item)
     else:
         raise ValueError(f"Unsupported platform: {platform}")
 
+    return _finish_extraction(
+        url, platform, username, items, watermark, stored_items, limit, incremental, on_item,
+    )
+
+
+def run_extractors(
+    urls: list[str],
+    limit: int = DEFAULT_EXTRACTION_LIMIT,
+    on_item: Callable[[str, ContentItem], None] | None = None,
+) -> tuple[list[ExtractionResult], dict[str, str]]:
+    """Run ``run_extractor`` for several URLs concurrently.
+
+    YouTube concurrency is capped by EXTRACTION_CONCURRENCY. IG/TikTok profiles
+    are extracted on the calling thread, which starts every Apify run up front
+    (each with its own watermark) and collects them as they finish.
+    ``on_item`` is called with the source URL and each item. Returns the successful
+    results in input order and an error message for each failed URL.
+    """
+    slots = {
+        platform: threading.BoundedSemaphore(max(1, cap))
+        for platform, cap in EXTRACTION_CONCURRENCY.items()
+    }
+
+    def _extract(url: str) -> ExtractionResult:
+        forward = (lambda item: on_item(url, item)) if on_item else None
+        with slots[detect_platform(url)]:
+            return run_extractor(url, limit, on_item=forward)
+
+    results: list[ExtractionResult] = []
+    errors: dict[str, str] = {}
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return results, errors
+
+    apify_urls = [url for url in urls if _uses_apify(url)]
+    other_urls = [url for url in urls if url not in apify_urls]
+    outcomes: dict[str, ExtractionResult | Exception] = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, len(other_urls)), thread_name_prefix="extract") as pool:
+        futures = {url: pool.submit(_extract, url) for url in other_urls}
+        if apify_urls:
+            try:
+                outcomes.update(_extract_apify_profiles(apify_urls, limit, on_item))
+            except Exception as exc:
+                outcomes.update({url: exc for url in apify_urls})
+
+    for url, future in futures.items():
+        try:
+            outcomes[url] = future.result()
+        except Exception as exc:
+            outcomes[url] = exc
+
+    for url in urls:
+        outcome = outcomes[url]
+        if isinstance(outcome, Exception):
+            logger.error("Extraction failed for %s: %s", url, outcome)
+            errors[url] = str(outcome)
+        else:
+            results.append(outcome)
+
+    return results, errors
+
+
+def _uses_apify(url: str) -> bool:
+    try:
+        return detect_platform(url) in _APIFY_ITEM_BUILDERS
+    except ValueError:
+        return False
+
+
+def _extract_apify_profiles(
+    urls: list[str],
+    limit: int,
+    on_item: Callable[[str, ContentItem], None] | None = None,
+    incremental: bool = INCREMENTAL_EXTRACTION,
+) -> dict[str, ExtractionResult | Exception]:
+    """Extract several IG/TikTok profiles with all their actor runs in flight at once.
+
+    Each profile keeps its own incremental watermark. Returns the result, or the
+    exception that failed it, for every URL.
+    """
+    accounts = []
+    outcomes: dict[str, ExtractionResult | Exception] = {}
+    for url in urls:
+        platform = detect_platform(url)
+        username = extract_username(url, platform)
+        try:
+            watermark, stored_items = _load_account_items(platform, username, limit, incremental)
+        except Exception as exc:
+            outcomes[url] = exc
+            continue
+        accounts.append((url, platform, username, watermark, stored_items))
+
+    profiles = [(platform, username, watermark) for _, platform, username, watermark, _ in accounts]
+    for index, raw_items in scrape_profiles(profiles, limit):
+        url, platform, username, watermark, stored_items = accounts[index]
+        if isinstance(raw_items, Exception):
+            outcomes[url] = raw_items
+            continue
+        forward = (lambda item, url=url: on_item(url, item)) if on_item else None
+        try:
+            items = _APIFY_ITEM_BUILDERS[platform](raw_items, forward)
+            outcomes[url] = _finish_extraction(
+                url, platform, username, items, watermark, stored_items, limit, incremental, forward,
+            )
+        except Exception as exc:
+            outcomes[url] = exc
+    return outcomes
+
+
+def _load_account_items(
+    platform: str,
+    username: str,
+    limit: int,
+    incremental: bool,
+) -> tuple[datetime | None, list[ContentItem]]:
+    """Return the account's watermark and stored items, or nothing for a full extraction."""
+    logger.info(
+        "Extracting %s content for @%s (limit=%d, incremental=%s)",
+        platform, username, limit, incremental,
+    )
+    if not incremental:
+        return None, []
+
+    watermark, raw_items = load_account(platform, username)
+    stored_items = [ContentItem(**raw) for raw in raw_items]
+    logger.info(
+        "Found %d stored items for %s/@%s (watermark=%s)",
+        len(stored_items), platform, username, watermark,
+    )
+    return watermark, stored_items
+
+
+def _finish_extraction(
+    url: str,
+    platform: str,
+    username: str,
+    items: list[ContentItem],
+    watermark: datetime | None,
+    stored_items: list[ContentItem],
+    limit: int,
+    incremental: bool,
+    on_item: Callable[[ContentItem], None] | None = None,
+) -> ExtractionResult:
+    """Merge fresh items into the stored ones, advance the watermark and build the result."""
+    if incremental:
+        logger.info("Fetched %d new items for %s/@%s", len(items), platform, username)
+        new_urls = {item.url for item in items}
+        items = _merge_items(items, stored_items, limit)
+        if on_item:
+            for item in items:
+                if item.url not in new_urls:
+                    on_item(item)
+        save_account(
+            platform,
+            username,
+            max((_as_utc(item.published_at) for item in items), default=watermark),
+            [item.model_dump(mode="json") for item in items],
+        )
+
     return ExtractionResult(
         source_url=url,
         platform=platform,
@@ -101,25 +290,85 @@ def run_extractor(url: str, limit: int = DEFAULT_EXTRACTION_LIMIT) -> Extraction
     )
 
 
-def _extract_youtube(url: str, limit: int) -> list[ContentItem]:
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _merge_items(
+    new_items: list[ContentItem],
+    stored_items: list[ContentItem],
+    limit: int,
+) -> list[ContentItem]:
+    """Merge freshly fetched items into the stored ones, newest first.
+
+    Every fresh item is kept (and wins over a stored copy with the same URL, so its
+    counters are up to date); stored items fill the remaining room up to ``limit``.
+    """
+    new_urls = {item.url for item in new_items}
+    stored = sorted(
+        (item for item in stored_items if item.url not in new_urls),
+        key=lambda item: _as_utc(item.published_at),
+        reverse=True,
+    )
+    merged = new_items + stored[: max(0, limit - len(new_items))]
+    return sorted(merged, key=lambda item: _as_utc(item.published_at), reverse=True)
+
+
+def _iter_video_metadata(
+    videos: list[dict],
+    max_workers: int = YOUTUBE_METADATA_WORKERS,
+    timeout: float = YOUTUBE_VIDEO_TIMEOUT,
+) -> Iterator[tuple[dict, dict | None]]:
+    """Fetch video metadata on a bounded thread pool, yielding results in input order.
+
+    Videos whose fetch fails or exceeds ``timeout`` are yielded with ``None``.
+    """
+    if not videos:
+        return
+
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(videos))),
+        thread_name_prefix="yt-metadata",
+    )
+    try:
+        futures = [
+            executor.submit(get_video_metadata, video["url"], timeout)
+            for video in videos
+        ]
+        for video, future in zip(videos, futures):
+            try:
+                yield video, future.result(timeout=timeout)
+            except FutureTimeoutError:
+                logger.warning("Timed out after %ss getting metadata for %s", timeout, video["url"])
+                future.cancel()
+                yield video, None
+            except Exception:
+                logger.warning("Failed to get metadata for %s", video["url"])
+                yield video, None
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _extract_youtube(
+    url: str,
+    limit: int,
+    known_ids: set[str] | None = None,
+    on_item: Callable[[ContentItem], None] | None = None,
+) -> list[ContentItem]:
     normalized_url = _normalize_youtube_url(url)
-    video_list = get_channel_videos(normalized_url, limit)
+    video_list = [video for video in get_channel_videos(normalized_url, limit) if video.get("url")]
+    if known_ids:
+        video_list = [video for video in video_list if video.get("id") not in known_ids]
 
     items = []
-    for video in video_list:
-        video_url = video.get("url", "")
-        if not video_url:
-            continue
-
-        try:
-            metadata = get_video_metadata(video_url)
-        except Exception:
-            logger.warning("Failed to get metadata for %s", video_url)
+    for video, metadata in _iter_video_metadata(video_list):
+        if metadata is None:
             continue
 
+        video_url = video["url"]
         published_at = metadata.get("published_at") or datetime.now(timezone.utc)
 
-        items.append(ContentItem(
+        item = ContentItem(
             platform="youtube",
             title=metadata.get("title", video.get("title", "")),
             description=metadata.get("description", ""),
@@ -131,19 +380,41 @@ def _extract_youtube(url: str, limit: int) -> list[ContentItem]:
             duration=metadata.get("duration"),
             published_at=published_at,
             content_type="video",
-        ))
+        )
+        items.append(item)
+        if on_item:
+            on_item(item)
+
+    http_stats = get_http_stats()
+    logger.info(
+        "Caption HTTP session: %d requests, %d retries, %d failures, %.1f KB/s",
+        http_stats["requests"],
+        http_stats["retries"],
+        http_stats["failures"],
+        http_stats["bytes_per_second"] / 1024,
+    )
 
     return items
 
 
-def _extract_instagram(username: str, limit: int) -> list[ContentItem]:
-    raw_items = scrape_instagram(username, limit)
+def _extract_instagram(
+    username: str,
+    limit: int,
+    newer_than: datetime | None = None,
+    on_item: Callable[[ContentItem], None] | None = None,
+) -> list[ContentItem]:
+    return _instagram_items(scrape_instagram(username, limit, newer_than), on_item)
+
 
+def _instagram_items(
+    raw_items: list[dict],
+    on_item: Callable[[ContentItem], None] | None = None,
+) -> list[ContentItem]:
     items = []
     for raw in raw_items:
         published_at = raw.get("published_at") or datetime.now(timezone.utc)
 
-        items.append(ContentItem(
+        item = ContentItem(
             platform="instagram",
             description=raw.get("description", ""),
             url=raw.get("url", ""),
@@ -153,19 +424,32 @@ def _extract_instagram(username: str, limit: int) -> list[ContentItem]:
             hashtags=raw.get("hashtags", []),
             published_at=published_at,
             content_type=raw.get("content_type", "image"),
-        ))
+        )
+        items.append(item)
+        if on_item:
+            on_item(item)
 
     return items
 
 
-def _extract_tiktok(username: str, limit: int) -> list[ContentItem]:
-    raw_items = scrape_tiktok(username, limit)
+def _extract_tiktok(
+    username: str,
+    limit: int,
+    newer_than: datetime | None = None,
+    on_item: Callable[[ContentItem], None] | None = None,
+) -> list[ContentItem]:
+    return _tiktok_items(scrape_tiktok(username, limit, newer_than), on_item)
 
+
+def _tiktok_items(
+    raw_items: list[dict],
+    on_item: Callable[[ContentItem], None] | None = None,
+) -> list[ContentItem]:
     items = []
     for raw in raw_items:
         published_at = raw.get("published_at") or datetime.now(timezone.utc)
 
-        items.append(ContentItem(
+        item = ContentItem(
             platform="tiktok",
             description=raw.get("description", ""),
             url=raw.get("url", ""),
@@ -177,6 +461,15 @@ def _extract_tiktok(username: str, limit: int) -> list[ContentItem]:
             published_at=published_at,
             content_type="video",
             duration=raw.get("duration"),
-        ))
+        )
+        items.append(item)
+        if on_item:
+            on_item(item)
 
     return items
+
+
+_APIFY_ITEM_BUILDERS = {
+    "instagram": _instagram_items,
+    "tiktok": _tiktok_items,
+}
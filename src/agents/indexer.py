@@ -1,10 +1,21 @@
+import hashlib
+import json
 import logging
 import re
+import uuid
+from collections.abc import Callable, Iterable
 
-from config import CHUNK_SIZE
+from config import CHUNK_OVERLAP_TOKENS, CHUNK_SIZE, INDEX_BATCH_SIZE
 from models.content import ContentItem, ExtractionResult, IndexResult
-from services.embeddings import generate_embeddings
-from services.qdrant import ensure_collection, upsert_chunks
+from services.embeddings import embed, get_max_seq_length, get_tokenizer
+from services.qdrant import (
+    delete_points,
+    ensure_collection,
+    get_payload_field,
+    overwrite_payloads,
+    upsert_chunks,
+)
+from services.retrieval import invalidate as invalidate_snapshot
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +38,72 @@ def _split_text(text: str, chunk_size: int = CHUNK_SIZE) -> list[str]:
     return chunks
 
 
+# Sentence-ending punctuation, optionally followed by closing quotes/brackets
+_SENTENCE_END = re.compile(r"[.!?…]+[\"'»”)\]]*(?=\s|$)")
+
+
+def _split_text_by_tokens(
+    text: str,
+    max_tokens: int | None = None,
+    overlap: int = CHUNK_OVERLAP_TOKENS,
+) -> list[str]:
+    """Split text into windows sized to the embedding model's sequence limit.
+
+    Tokens are counted with the model's own tokenizer so no chunk is truncated at
+    encode time. Consecutive windows share ``overlap`` tokens, and each window ends
+    on a sentence boundary when one falls in its second half (on a word boundary
+    otherwise). Falls back to the word-based splitter without a fast tokenizer.
+    """
+    tokenizer = get_tokenizer()
+    if not getattr(tokenizer, "is_fast", False):
+        return _split_text(text)
+    if max_tokens is None:
+        max_tokens = get_max_seq_length() - tokenizer.num_special_tokens_to_add()
+
+    offsets = tokenizer(
+        text,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        truncation=False,
+        verbose=False,
+    )["offset_mapping"]
+    total = len(offsets)
+    if total <= max_tokens:
+        return [text] if text.strip() else []
+
+    sentence_ends = {match.end() for match in _SENTENCE_END.finditer(text)}
+
+    def starts_word(i: int) -> bool:
+        return i == 0 or i >= total or offsets[i][0] > offsets[i - 1][1]
+
+    chunks = []
+    start = 0
+    while start < total:
+        end = min(start + max_tokens, total)
+        if end < total:
+            floor = start + max_tokens // 2
+            cut = next(
+                (i + 1 for i in range(end - 1, floor - 1, -1) if offsets[i][1] in sentence_ends),
+                None,
+            )
+            if cut is None:
+                cut = next((i for i in range(end, floor, -1) if starts_word(i)), end)
+            end = cut
+
+        chunk = text[offsets[start][0] : offsets[end - 1][1]].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= total:
+            break
+
+        next_start = max(end - overlap, start + 1)
+        while next_start < end and not starts_word(next_start):
+            next_start += 1
+        start = next_start
+
+    return chunks
+
+
 def _item_metadata(item: ContentItem) -> dict:
     return {
         "platform": item.platform,
@@ -55,7 +132,7 @@ def chunk_content(item: ContentItem) -> list[dict]:
 
         # Chunk 2+: transcript split into chunks
         if item.transcript:
-            for part in _split_text(item.transcript):
+            for part in _split_text_by_tokens(item.transcript):
                 chunks.append({"text": part, **metadata, "chunk_type": "transcript"})
     else:
         # IG/TikTok: each post is a single chunk
@@ -68,42 +145,157 @@ def chunk_content(item: ContentItem) -> list[dict]:
     return chunks
 
 
-def run_indexer(extraction: ExtractionResult) -> IndexResult:
-    collection_name = _make_collection_name(extraction.platform, extraction.username)
+def _chunk_id(chunk: dict) -> str:
+    """Stable point id from (source URL, chunk type, text hash)."""
+    text_hash = hashlib.sha256(chunk["text"].encode()).hexdigest()
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{chunk['url']}|{chunk['chunk_type']}|{text_hash}"))
 
+
+def _payload_hash(chunk: dict) -> str:
+    return hashlib.sha256(json.dumps(chunk, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def run_indexer(
+    extraction: ExtractionResult,
+    should_prune: Callable[[], bool] | None = None,
+) -> IndexResult:
     logger.info(
-        "Indexing %d items for @%s into collection '%s'",
+        "Indexing %d items for @%s",
         len(extraction.items),
         extraction.username,
-        collection_name,
     )
+    return run_streaming_indexer(
+        extraction.items, extraction.platform, extraction.username, should_prune=should_prune,
+    )
+
 
-    # Generate all chunks
-    all_chunks = []
-    for item in extraction.items:
-        all_chunks.extend(chunk_content(item))
-
-    if not all_chunks:
-        logger.warning("No chunks generated for @%s", extraction.username)
-        return IndexResult(
-            collection_name=collection_name,
-            chunks_indexed=0,
-            platform=extraction.platform,
-            username=extraction.username,
-        )
-
-    # Generate embeddings
-    texts = [chunk["text"] for chunk in all_chunks]
-    logger.info("Generating embeddings for %d chunks", len(texts))
-    embeddings = generate_embeddings(texts)
-
-    # Store in Qdrant
-    ensure_collection(collection_name)
-    upsert_chunks(collection_name, all_chunks, embeddings)
+def run_in_memory_indexer(extraction: ExtractionResult) -> IndexResult:
+    """Context provider for niche_description mode.
 
+    The synthetic extraction holds the user's description, which is all retrieval
+    could ever return, so it is kept on the IndexResult instead of being embedded
+    into a Qdrant collection.
+    """
+    texts = list(dict.fromkeys(
+        item.description.strip() for item in extraction.items if item.description.strip()
+    ))
+    logger.info("Keeping %d niche description text(s) for @%s in memory", len(texts), extraction.username)
     return IndexResult(
-        collection_name=collection_name,
-        chunks_indexed=len(all_chunks),
+        collection_name=_make_collection_name(extraction.platform, extraction.username),
+        chunks_indexed=len(texts),
         platform=extraction.platform,
         username=extraction.username,
+        context_text="\n---\n".join(texts),
+    )
+
+
+def run_streaming_indexer(
+    items: Iterable[ContentItem],
+    platform: str,
+    username: str,
+    batch_size: int = INDEX_BATCH_SIZE,
+    should_prune: Callable[[], bool] | None = None,
+    superseded: Callable[[], Iterable[ContentItem]] | None = None,
+) -> IndexResult:
+    """Chunk, embed and upsert items in micro-batches as they arrive.
+
+    ``items`` may be a lazy stream (e.g. fed by a running extraction); embedding
+    starts as soon as ``batch_size`` chunks are ready.
+
+    Indexing is incremental: chunk ids are derived from their content, so chunks
+    already stored are skipped, chunks whose metadata changed only get their
+    payload rewritten, and only new chunks are embedded. Once the stream ends,
+    stored chunks that were not seen again are deleted, unless ``should_prune``
+    returns False (e.g. because part of the extraction failed). Chunks of the items
+    returned by ``superseded`` (copies replaced by a preferred duplicate after they
+    were streamed) are always deleted.
+    """
+    collection_name = _make_collection_name(platform, username)
+    logger.info("Streaming index for @%s into collection '%s'", username, collection_name)
+
+    existing = get_payload_field(collection_name, "payload_hash")
+    # payload_hash of every stored point, kept current as this run writes
+    stored = dict(existing)
+    seen: set[str] = set()
+    embedded: set[str] = set()
+    updated: set[str] = set()
+    pending: list[dict] = []
+    collection_ready = bool(existing)
+
+    def flush() -> None:
+        nonlocal collection_ready
+        # A chunk queued again (e.g. an item whose metrics changed after a merge)
+        # replaces the earlier copy
+        batch = {_chunk_id(chunk): chunk for chunk in pending}
+        pending.clear()
+
+        new_chunks: list[dict] = []
+        new_ids: list[str] = []
+        changed: dict[str, dict] = {}
+        for point_id, chunk in batch.items():
+            seen.add(point_id)
+            payload = {**chunk, "payload_hash": _payload_hash(chunk)}
+            if point_id not in stored:
+                new_chunks.append(payload)
+                new_ids.append(point_id)
+            elif stored[point_id] != payload["payload_hash"]:
+                changed[point_id] = payload
+
+        if new_chunks:
+            logger.info("Generating embeddings for %d new chunks", len(new_chunks))
+            embeddings = embed([chunk["text"] for chunk in new_chunks])
+            if not collection_ready:
+                ensure_collection(collection_name)
+                collection_ready = True
+            upsert_chunks(collection_name, new_chunks, embeddings, ids=new_ids)
+            embedded.update(new_ids)
+        if changed:
+            overwrite_payloads(collection_name, changed)
+            updated.update(changed)
+        for point_id, payload in zip(new_ids, new_chunks):
+            stored[point_id] = payload["payload_hash"]
+        for point_id, payload in changed.items():
+            stored[point_id] = payload["payload_hash"]
+
+    for item in items:
+        pending.extend(chunk_content(item))
+        if len(pending) >= batch_size:
+            flush()
+    flush()
+
+    replaced = {
+        _chunk_id(chunk)
+        for item in (superseded() if superseded is not None else ())
+        for chunk in chunk_content(item)
+    }
+    seen -= replaced
+    embedded -= replaced
+    updated -= replaced
+
+    orphans = [point_id for point_id in existing if point_id not in seen]
+    if not seen:
+        logger.warning("No chunks generated for @%s", username)
+        orphans = []  # never wipe a collection because of an empty extraction
+    elif orphans and should_prune is not None and not should_prune():
+        logger.info("Keeping %d chunks not seen in this run (extraction incomplete)", len(orphans))
+        orphans = []
+    orphans += [point_id for point_id in replaced if point_id in stored and point_id not in orphans]
+    delete_points(collection_name, orphans)
+    # Searches of this run must see the new points, not a snapshot from an earlier run
+    invalidate_snapshot(collection_name)
+
+    chunks_updated = len(updated - embedded)
+    logger.info(
+        "Indexed @%s: %d new, %d updated, %d unchanged, %d deleted",
+        username, len(embedded), chunks_updated,
+        len(seen) - len(embedded) - chunks_updated, len(orphans),
+    )
+
+    return IndexResult(
+        collection_name=collection_name,
+        chunks_indexed=len(seen),
+        chunks_embedded=len(embedded),
+        chunks_deleted=len(orphans),
+        platform=platform,
+        username=username,
     )
@@ -5,8 +5,9 @@ from datetime import timedelta
 from models.content import IndexResult
 from models.strategy import CalendarConfig, ContentBrief, ContentCalendar
 from services.embeddings import generate_embeddings
+from services.framework_cache import search_frameworks
 from services.llm import generate
-from services.qdrant import search, search_viral_frameworks
+from services.retrieval import search_batch
 
 logger = logging.getLogger(__name__)
 
@@ -102,9 +103,9 @@ def _query_niche_insights(collection_name: str) -> str:
     """
     all_results = []
 
-    for query in NICHE_QUERIES:
-        query_embedding = generate_embeddings([query])[0]
-        results = search(collection_name, query_embedding, limit=5)
+    # All queries are encoded in one call and searched in one batch request
+    query_embeddings = generate_embeddings(NICHE_QUERIES)
+    for results in search_batch(collection_name, query_embeddings, limit=5, include=["text"]):
         for r in results:
             text = r.get("text", "")
             if text and text not in all_results:
@@ -135,27 +136,35 @@ def _extract_user_tone(niche_context: str) -> str | None:
 
 # --- Search 2: Viral frameworks library ---
 
-def _query_viral_frameworks_for_pillar(
-    pillar: str,
+# The only framework fields _format_frameworks reads
+_FRAMEWORK_FIELDS = ["template_maestro", "metadata.formato_tipo", "analisis_tecnico.hook_formula_logic"]
+
+
+def _query_viral_frameworks_for_pillars(
+    pillars: list[str],
     platform: str,
     user_tone: str | None,
     niche_snippet: str,
-) -> str:
-    """Fetch viral framework templates for a given pillar, filtered by objetivo + plataforma (+ tone)."""
-    objetivo = PILLAR_TO_OBJETIVO.get(pillar.lower(), "VIRAL_GROWTH")
+) -> list[str]:
+    """Fetch viral framework templates for each pillar, filtered by objetivo + plataforma (+ tone).
+
+    All pillars are embedded in one call; pillars not in the result cache are
+    searched in one batched request.
+    """
     plataforma = PLATFORM_DISPLAY_MAP.get(platform.lower(), platform.capitalize())
+    facets = [
+        (PILLAR_TO_OBJETIVO.get(pillar.lower(), "VIRAL_GROWTH"), plataforma, user_tone)
+        for pillar in pillars
+    ]
 
-    query_text = f"{pillar} {platform} {niche_snippet[:300]}"
-    query_embedding = generate_embeddings([query_text])[0]
+    query_texts = [f"{pillar} {platform} {niche_snippet[:300]}" for pillar in pillars]
+    query_embeddings = generate_embeddings(query_texts)
+
+    results_per_pillar = search_frameworks(query_embeddings, facets, limit=2, include=_FRAMEWORK_FIELDS)
+    return [_format_frameworks(results) for results in results_per_pillar]
 
-    results = search_viral_frameworks(
-        query_embedding=query_embedding,
-        objetivo=objetivo,
-        plataforma=plataforma,
-        tono=user_tone,
-        limit=2,
-    )
 
+def _format_frameworks(results: list[dict]) -> str:
     if not results:
         return ""
 
@@ -183,12 +192,16 @@ def _build_viral_frameworks_section(
     lines = ["## FRAMEWORKS VIRALES (estructuras probadas — úsalas como molde para los briefs):"]
     found_any = False
 
-    for pillar, label in [
+    pillars = [
         ("viralidad", "VIRALIDAD"),
         ("autoridad", "AUTORIDAD"),
         ("venta", "VENTA"),
-    ]:
-        frameworks = _query_viral_frameworks_for_pillar(pillar, platform, user_tone, niche_snippet)
+    ]
+    frameworks_per_pillar = _query_viral_frameworks_for_pillars(
+        [pillar for pillar, _ in pillars], platform, user_tone, niche_snippet,
+    )
+
+    for (_, label), frameworks in zip(pillars, frameworks_per_pillar):
         if frameworks:
             found_any = True
             lines.append(f"\n### Para piezas de {label}:\n{frameworks}")
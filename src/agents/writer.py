@@ -10,7 +10,7 @@ from models.strategy import (
 )
 from services.embeddings import generate_embeddings
 from services.llm import generate
-from services.qdrant import search
+from services.retrieval import search_batch
 
 logger = logging.getLogger(__name__)
 
@@ -87,18 +87,38 @@ def _get_writer_system_instruction(input_mode: str) -> str:
     return _WRITER_SYSTEM_BASE.format(context=context)
 
 
-def _get_niche_data_for_brief(collection_name: str, brief: ContentBrief) -> str:
-    query = f"{brief.topic} {brief.angle}"
-    query_embedding = generate_embeddings([query])[0]
-    results = search(collection_name, query_embedding, limit=5)
+def get_niche_data_for_briefs(
+    collection_name: str,
+    briefs: list[ContentBrief],
+    context_text: str | None = None,
+) -> list[str]:
+    """Retrieve niche data for several briefs with one encode call and one batched search.
+
+    With ``context_text`` (niche_description mode) every brief gets that text and
+    nothing is embedded or searched.
+    """
+    if not briefs:
+        return []
+    if context_text is not None:
+        return [context_text or "No hay datos específicos disponibles."] * len(briefs)
+
+    queries = [f"{brief.topic} {brief.angle}" for brief in briefs]
+    query_embeddings = generate_embeddings(queries)
+
+    niche_data = []
+    for results in search_batch(collection_name, query_embeddings, limit=5, include=["text"]):
+        texts = []
+        for r in results:
+            text = r.get("text", "")
+            if text:
+                texts.append(text)
+        niche_data.append("\n---\n".join(texts) if texts else "No hay datos específicos disponibles.")
+
+    return niche_data
 
-    texts = []
-    for r in results:
-        text = r.get("text", "")
-        if text:
-            texts.append(text)
 
-    return "\n---\n".join(texts) if texts else "No hay datos específicos disponibles."
+def _get_niche_data_for_brief(collection_name: str, brief: ContentBrief) -> str:
+    return get_niche_data_for_briefs(collection_name, [brief])[0]
 
 
 def _build_script_prompt(
@@ -249,6 +269,7 @@ def run_writer(
     collection_name: str,
     template: str | None = None,
     input_mode: str = "own_account",
+    context_text: str | None = None,
 ) -> WriterResult:
     logger.info(
         "Writing scripts for @%s: %d briefs",
@@ -256,8 +277,11 @@ def run_writer(
         len(calendar.briefs),
     )
 
+    # Retrieve niche data for every brief up front in a single round trip
+    niche_data_per_brief = get_niche_data_for_briefs(collection_name, calendar.briefs, context_text)
+
     scripts = []
-    for i, brief in enumerate(calendar.briefs):
+    for i, (brief, niche_data) in enumerate(zip(calendar.briefs, niche_data_per_brief)):
         logger.info(
             "Writing script %d/%d: %s (%s)",
             i + 1,
@@ -266,13 +290,10 @@ def run_writer(
             brief.pillar,
         )
 
-        # 1. Get niche data for this specific brief
-        niche_data = _get_niche_data_for_brief(collection_name, brief)
-
-        # 2. Build prompt
+        # 1. Build prompt
         prompt = _build_script_prompt(brief, niche_data, calendar.platform, template, input_mode)
 
-        # 3. Generate script with Gemini (retry once on parse failure)
+        # 2. Generate script with Gemini (retry once on parse failure)
         script = None
         system_instruction = _get_writer_system_instruction(input_mode)
         for attempt in range(2):
@@ -322,8 +343,13 @@ def rewrite_script(
     platform: str,
     template: str | None = None,
     input_mode: str = "own_account",
+    niche_data: str | None = None,
 ) -> Script:
-    """Rewrite a single script based on critic feedback."""
+    """Rewrite a single script based on critic feedback.
+
+    ``niche_data`` can be prefetched with get_niche_data_for_briefs; it is
+    retrieved from ``collection_name`` otherwise.
+    """
     brief = script.brief
 
     # Build feedback string
@@ -332,7 +358,8 @@ def rewrite_script(
         for fb in feedback
     )
 
-    niche_data = _get_niche_data_for_brief(collection_name, brief)
+    if niche_data is None:
+        niche_data = _get_niche_data_for_brief(collection_name, brief)
     platform_guide = PLATFORM_STYLE.get(platform, "")
 
     template_section = ""
@@ -279,11 +279,16 @@ if st.button("Generar Plan de Contenido", type="primary", use_container_width=Tr
                             ext = node_output["extraction"]
                             if input_mode == "own_account":
                                 st.write(f"Extraidos {len(ext.items)} items de @{ext.username}")
+                                for failed_url, error in node_output.get("extraction_errors", {}).items():
+                                    st.warning(f"No se pudo extraer {failed_url}: {error}")
                             else:
                                 st.write(f"Descripcion de nicho procesada para @{ext.username}")
                         elif node_name == "index" and node_output.get("index_result"):
                             idx = node_output["index_result"]
-                            st.write(f"Indexados {idx.chunks_indexed} chunks")
+                            if idx.context_text is not None:
+                                st.write(f"Descripcion de nicho lista como contexto para @{idx.username} (sin indexar)")
+                            else:
+                                st.write(f"Indexados {idx.chunks_indexed} chunks ({idx.chunks_embedded} nuevos)")
                         elif node_name == "strategize" and node_output.get("calendars"):
                             cals = node_output["calendars"]
                             total_briefs = sum(len(c.briefs) for c in cals)
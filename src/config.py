@@ -10,13 +10,102 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "")
 QDRANT_URL = os.getenv("QDRANT_URL", "")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY", "")
+# Embedded Qdrant instead of a server: a local directory, or ":memory:". Takes precedence over QDRANT_URL.
+QDRANT_PATH = os.getenv("QDRANT_PATH", "")
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+QDRANT_UPSERT_BATCH_SIZE = int(os.getenv("QDRANT_UPSERT_BATCH_SIZE", "256"))
+# Upsert batches in flight at once during bulk loads
+QDRANT_UPSERT_PARALLELISM = int(os.getenv("QDRANT_UPSERT_PARALLELISM", "4"))
+# Storage profiles (see services/qdrant.STORAGE_PROFILES) for newly created collections
+QDRANT_ACCOUNT_PROFILE = os.getenv("QDRANT_ACCOUNT_PROFILE", "compact")
+QDRANT_FRAMEWORKS_PROFILE = os.getenv("QDRANT_FRAMEWORKS_PROFILE", "default")
+# Candidates fetched per result with quantized vectors, rescored with the originals
+QDRANT_QUANTIZATION_OVERSAMPLING = float(os.getenv("QDRANT_QUANTIZATION_OVERSAMPLING", "2.0"))
 
 DEFAULT_EXTRACTION_LIMIT = 50
+# Max simultaneous extractions per source platform in the extract node. IG/TikTok
+# profiles are not capped: their Apify runs are all started and polled from one worker
+EXTRACTION_CONCURRENCY = {
+    "youtube": int(os.getenv("YOUTUBE_EXTRACTION_CONCURRENCY", "2")),
+}
+# Min estimated Jaccard similarity for two items from different URLs to count as the same content
+DEDUP_SIMILARITY_THRESHOLD = float(os.getenv("DEDUP_SIMILARITY_THRESHOLD", "0.8"))
+INCREMENTAL_EXTRACTION = os.getenv("INCREMENTAL_EXTRACTION", "false").lower() == "true"
+YOUTUBE_METADATA_WORKERS = int(os.getenv("YOUTUBE_METADATA_WORKERS", "8"))
+YOUTUBE_VIDEO_TIMEOUT = int(os.getenv("YOUTUBE_VIDEO_TIMEOUT", "60"))
+
+APIFY_POLL_INTERVAL = float(os.getenv("APIFY_POLL_INTERVAL", "5"))
+APIFY_RUN_TIMEOUT = int(os.getenv("APIFY_RUN_TIMEOUT", "900"))
+APIFY_PAGE_SIZE = int(os.getenv("APIFY_PAGE_SIZE", "200"))
+
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "20"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
 
 GEMINI_MODEL = "gemini-2.5-flash"
 
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 EMBEDDING_DIMENSIONS = 384
-CHUNK_SIZE = 500
+# "torch" or "onnx" (int8-quantized export, needs sentence-transformers[onnx])
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "onnx/model_qint8_avx2.onnx")
+# Min cosine between ONNX and torch vectors on the parity fixtures; below it we fall back to torch
+EMBEDDING_PARITY_THRESHOLD = float(os.getenv("EMBEDDING_PARITY_THRESHOLD", "0.98"))
+CHUNK_SIZE = 500  # words, used by the fallback splitter when no fast tokenizer is available
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+
+# Encode batches are sized so batch_size * longest text stays under this many tokens
+EMBEDDING_BATCH_TOKENS = int(os.getenv("EMBEDDING_BATCH_TOKENS", "8192"))
+EMBEDDING_MAX_BATCH_SIZE = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "256"))
+# Processes for the sentence-transformers multi-process pool; 1 encodes in-process
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "1"))
+EMBEDDING_POOL_MIN_TEXTS = int(os.getenv("EMBEDDING_POOL_MIN_TEXTS", "256"))
+# Chunks per streaming-index flush. The indexer is the only caller that encodes
+# enough texts for the pool, so with workers a flush defaults to the pool minimum
+INDEX_BATCH_SIZE = int(os.getenv(
+    "INDEX_BATCH_SIZE", str(EMBEDDING_POOL_MIN_TEXTS if EMBEDDING_WORKERS > 1 else 64),
+))
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+CHECKPOINT_DB_PATH = str(DATA_DIR / "checkpoints.db")
+
+YOUTUBE_CACHE_ENABLED = os.getenv("YOUTUBE_CACHE_ENABLED", "true").lower() == "true"
+YOUTUBE_CACHE_DB_PATH = str(DATA_DIR / "youtube_cache.db")
+YOUTUBE_CACHE_COUNTERS_TTL = int(os.getenv("YOUTUBE_CACHE_COUNTERS_TTL", str(24 * 3600)))
+YOUTUBE_CACHE_STATIC_TTL = int(os.getenv("YOUTUBE_CACHE_STATIC_TTL", str(90 * 24 * 3600)))
+YOUTUBE_CACHE_MAX_ENTRIES = int(os.getenv("YOUTUBE_CACHE_MAX_ENTRIES", "20000"))
+
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_DB_PATH = str(DATA_DIR / "embedding_cache.db")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "100000"))
+# ONNX vs torch parity result per (model, ONNX file); delete it to re-run the check
+EMBEDDING_PARITY_PATH = str(DATA_DIR / "embedding_parity.json")
+
+EXTRACTION_STATE_DB_PATH = str(DATA_DIR / "extraction_state.db")
+
+# Account collections up to this many points are pulled into memory and searched locally;
+# larger ones are searched in Qdrant. The default has only been measured with
+# scripts/benchmark_retrieval.py against embedded ":memory:" Qdrant, NOT against a server
+# (where loading a snapshot also moves every vector over the network); re-run it with QDRANT_URL
+LOCAL_SEARCH_MAX_POINTS = int(os.getenv("LOCAL_SEARCH_MAX_POINTS", "500"))
+LOCAL_SEARCH_MAX_COLLECTIONS = int(os.getenv("LOCAL_SEARCH_MAX_COLLECTIONS", "8"))
+# Seconds a snapshot is reused, about one pipeline run; other processes may write meanwhile
+LOCAL_SEARCH_SNAPSHOT_TTL = int(os.getenv("LOCAL_SEARCH_SNAPSHOT_TTL", "600"))
+
+# Rewritten by the viral frameworks ingest; readers drop cached results when it changes
+VIRAL_FRAMEWORKS_VERSION_PATH = str(DATA_DIR / "viral_frameworks.version")
+VIRAL_CACHE_ENABLED = os.getenv("VIRAL_CACHE_ENABLED", "true").lower() == "true"
+# Query vectors are bucketed by the sign of this many random projections
+VIRAL_CACHE_HASH_BITS = int(os.getenv("VIRAL_CACHE_HASH_BITS", "16"))
+VIRAL_CACHE_MAX_ENTRIES = int(os.getenv("VIRAL_CACHE_MAX_ENTRIES", "1024"))
+# Keep the whole viral frameworks library in process and search it with NumPy
+VIRAL_LIBRARY_IN_MEMORY = os.getenv("VIRAL_LIBRARY_IN_MEMORY", "true").lower() == "true"
 
-CHECKPOINT_DB_PATH = str(Path(__file__).resolve().parent.parent / "data" / "checkpoints.db")
+# Record/replay of extraction services: "off", "record" or "replay"
+EXTRACTION_REPLAY_MODE = os.getenv("EXTRACTION_REPLAY_MODE", "off").lower()
+EXTRACTION_FIXTURES_DIR = os.getenv("EXTRACTION_FIXTURES_DIR", str(DATA_DIR / "fixtures"))
+# Simulated latency in replay mode: "250" for every call or "ytdlp=800,caption=40,apify=5000".
+# Kinds: ytdlp_channel, ytdlp_video (or "ytdlp" for both), caption, apify
+EXTRACTION_REPLAY_LATENCY_MS = os.getenv("EXTRACTION_REPLAY_LATENCY_MS", "0")
@@ -22,6 +22,7 @@ class PipelineState(TypedDict, total=False):
     output_formats: list[str]
     # Intermediate state
     extraction: ExtractionResult | None
+    extraction_errors: dict[str, str]  # url -> error, for sources that failed
     index_result: IndexResult | None
     calendars: list[ContentCalendar]
     writer_results: list[WriterResult]
@@ -1,5 +1,8 @@
 import logging
+import queue
 import sqlite3
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 
 from langgraph.checkpoint.sqlite import SqliteSaver
@@ -7,18 +10,38 @@ from langgraph.graph import END, StateGraph
 
 from agents.compiler import run_compiler
 from agents.critic import run_critic
-from agents.extractor import run_extractor, run_text_extractor
-from agents.indexer import run_indexer
+from agents.deduplicator import ContentDeduplicator, deduplicate_items
+from agents.extractor import detect_platform, extract_username, run_extractors, run_text_extractor
+from agents.indexer import run_in_memory_indexer, run_indexer, run_streaming_indexer
 from agents.strategist import run_strategist
-from agents.writer import rewrite_script, run_writer
+from agents.writer import get_niche_data_for_briefs, rewrite_script, run_writer
 from config import CHECKPOINT_DB_PATH
 from graph.state import PipelineState
+from models.content import ContentItem
 from models.strategy import WriterResult
 
 logger = logging.getLogger(__name__)
 
 MAX_CRITIC_ROUNDS = 2
 
+_END_OF_STREAM = object()
+
+
+def _iter_queue(item_queue: queue.Queue) -> Iterator:
+    while True:
+        item = item_queue.get()
+        if item is _END_OF_STREAM:
+            return
+        yield item
+
+
+def _is_supported(url: str) -> bool:
+    try:
+        detect_platform(url)
+    except ValueError:
+        return False
+    return True
+
 
 # --- Node functions ---
 
@@ -40,28 +63,93 @@ def extract(state: PipelineState) -> dict:
     urls = state["urls"]
     logger.info("Step 1/6: Extracting content from %d URL(s)", len(urls))
 
-    all_items = []
-    first_result = None
-    for url in urls:
-        result = run_extractor(url)
-        all_items.extend(result.items)
-        if first_result is None:
-            first_result = result
+    # Items are indexed on a background thread while later URLs/videos are still
+    # being extracted; the index node then reuses the resulting IndexResult.
+    primary_url = next((url for url in urls if _is_supported(url)), urls[0])
+    platform = detect_platform(primary_url)
+    username = extract_username(primary_url, platform)
+    item_queue: queue.Queue = queue.Queue()
+    # Duplicates across sources (same post via two URLs, cross-posts) are never embedded;
+    # a merged item is queued again so its combined metrics overwrite the indexed payload.
+    # Both deduplicators keep the copy from the earliest source in ``urls``, so the
+    # indexed copy matches the extraction whatever order the sources finish in
+    stream_deduplicator = ContentDeduplicator(source_order=urls)
+
+    def _enqueue(source_url: str, item: ContentItem) -> None:
+        merged = stream_deduplicator.add(item, source_url)
+        if not index_future.done():
+            item_queue.put(merged)
+
+    def _on_index_done(future: Future) -> None:
+        if future.exception() is not None:
+            logger.warning(
+                "Streaming index failed (%s), content will be indexed after extraction",
+                future.exception(),
+            )
+
+    # Chunks missing from this run are only pruned if every source was extracted
+    extraction_complete = False
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="stream-index") as pool:
+        index_future = pool.submit(
+            run_streaming_indexer, _iter_queue(item_queue), platform, username,
+            should_prune=lambda: extraction_complete,
+            superseded=lambda: stream_deduplicator.superseded,
+        )
+        index_future.add_done_callback(_on_index_done)
+        try:
+            results, errors = run_extractors(urls, on_item=_enqueue)
+            extraction_complete = not errors
+        finally:
+            item_queue.put(_END_OF_STREAM)
+        # A failed index (e.g. Qdrant unreachable) must not lose the extraction:
+        # the index node then indexes it with run_indexer
+        index_result = None if index_future.exception() else index_future.result()
+
+    if not results:
+        raise RuntimeError(
+            "Extraction failed for every URL: "
+            + "; ".join(f"{url}: {error}" for url, error in errors.items())
+        )
+    if errors:
+        logger.warning("Extraction failed for %d of %d URL(s)", len(errors), len(urls))
 
     combined = ExtractionResult(
-        source_url=urls[0],
-        platform=first_result.platform,
-        username=first_result.username,
-        items=all_items,
+        source_url=primary_url,
+        platform=platform,
+        username=username,
+        items=deduplicate_items(
+            [item for result in results for item in result.items],
+            [result.source_url for result in results for _ in result.items],
+        ),
         extracted_at=datetime.now(timezone.utc),
     )
 
-    return {"extraction": combined, "current_step": "extract"}
+    update = {
+        "extraction": combined,
+        "extraction_errors": errors,
+        "current_step": "extract",
+    }
+    if index_result is not None:
+        update["index_result"] = index_result
+    return update
 
 
 def index(state: PipelineState) -> dict:
+    if state.get("index_result") is not None:
+        logger.info("Step 2/6: Content already indexed while extracting")
+        return {"index_result": state["index_result"], "current_step": "index"}
+
+    if state.get("input_mode", "own_account") == "niche_description":
+        logger.info("Step 2/6: Keeping niche description in memory (no vector store)")
+        index_result = run_in_memory_indexer(state["extraction"])
+        return {"index_result": index_result, "current_step": "index"}
+
     logger.info("Step 2/6: Indexing content into Qdrant")
-    index_result = run_indexer(state["extraction"])
+    # Stored chunks of a source that failed to extract this run must not be pruned
+    index_result = run_indexer(
+        state["extraction"], should_prune=lambda: not state.get("extraction_errors"),
+    )
     return {"index_result": index_result, "current_step": "index"}
 
 
@@ -86,12 +174,13 @@ def strategize(state: PipelineState) -> dict:
 def write(state: PipelineState) -> dict:
     logger.info("Step 4/6: Writing scripts")
     collection_name = state["index_result"].collection_name
+    context_text = state["index_result"].context_text
     template = state.get("template")
     input_mode = state.get("input_mode", "own_account")
 
     writer_results = []
     for calendar in state["calendars"]:
-        writer_result = run_writer(calendar, collection_name, template, input_mode)
+        writer_result = run_writer(calendar, collection_name, template, input_mode, context_text)
         writer_results.append(writer_result)
 
     return {
@@ -124,6 +213,20 @@ def rewrite(state: PipelineState) -> dict:
     input_mode = state.get("input_mode", "own_account")
     feedback = state.get("critic_feedback", {})
 
+    # Retrieve niche data for every script to rewrite in a single batched round trip
+    to_rewrite = {
+        f"{wr.platform}_{i}": script.brief
+        for wr in state["writer_results"]
+        for i, script in enumerate(wr.scripts)
+        if feedback.get(f"{wr.platform}_{i}")
+    }
+    niche_data_by_key = dict(zip(
+        to_rewrite,
+        get_niche_data_for_briefs(
+            collection_name, list(to_rewrite.values()), state["index_result"].context_text,
+        ),
+    ))
+
     new_writer_results = []
     for wr in state["writer_results"]:
         platform = wr.platform
@@ -140,6 +243,7 @@ def rewrite(state: PipelineState) -> dict:
                 )
                 new_script = rewrite_script(
                     script, script_feedback, collection_name, platform, template, input_mode,
+                    niche_data=niche_data_by_key[script_key],
                 )
                 new_scripts.append(new_script)
             else:
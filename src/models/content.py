@@ -35,5 +35,9 @@ class ExtractionResult(_RevalidatingModel):
 class IndexResult(_RevalidatingModel):
     collection_name: str
     chunks_indexed: int
+    chunks_embedded: int = 0
+    chunks_deleted: int = 0
     platform: str
     username: str
+    # niche_description mode: retrieval is served from this text and no collection exists
+    context_text: str | None = None
@@ -0,0 +1,95 @@
+import argparse
+import random
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+
+from agents.indexer import _split_text, _split_text_by_tokens
+from services.embeddings import get_max_seq_length, get_model, get_tokenizer
+
+
+def _visible_spans(text: str, chunks: list[str], max_tokens: int) -> list[tuple[int, int]]:
+    """Char span of each chunk inside ``text`` that the model actually reads (before truncation)."""
+    tokenizer = get_tokenizer()
+    spans = []
+    cursor = 0
+    for chunk in chunks:
+        start = text.find(chunk, cursor)
+        if start == -1:
+            start = text.find(chunk)
+        offsets = tokenizer(
+            chunk, add_special_tokens=False, return_offsets_mapping=True, verbose=False,
+        )["offset_mapping"]
+        visible = offsets[min(len(offsets), max_tokens) - 1][1] if offsets else 0
+        spans.append((start, start + visible))
+        cursor = start + 1
+    return spans
+
+
+def _coverage(text: str, spans: list[tuple[int, int]]) -> float:
+    covered = np.zeros(len(text), dtype=bool)
+    for start, end in spans:
+        covered[start:end] = True
+    return float(covered.mean()) if len(text) else 0.0
+
+
+def _retrieval_hit_rate(
+    text: str,
+    chunk_vectors: np.ndarray,
+    spans: list[tuple[int, int]],
+    probes: int,
+    rng: random.Random,
+) -> float:
+    """Share of sampled sentences whose top-1 chunk actually contains them in its visible part."""
+    sentences = [m for m in re.finditer(r"[^.!?]{40,}[.!?]", text)]
+    if not sentences:
+        return 0.0
+    sample = rng.sample(sentences, min(probes, len(sentences)))
+
+    query_vectors = get_model().encode([m.group().strip() for m in sample], normalize_embeddings=True)
+    best = (query_vectors @ chunk_vectors.T).argmax(axis=1)
+
+    hits = 0
+    for match, chunk_index in zip(sample, best):
+        start, end = spans[chunk_index]
+        hits += start <= match.start() and match.end() <= end
+    return hits / len(sample)
+
+
+def benchmark(paths: list[str], probes: int, seed: int) -> None:
+    model = get_model()
+    max_tokens = get_max_seq_length() - get_tokenizer().num_special_tokens_to_add()
+
+    for path in paths:
+        text = " ".join(Path(path).read_text(encoding="utf-8").split())
+        print(f"\n{path}: {len(text.split())} words, model window {max_tokens} tokens")
+
+        for name, splitter in [("words (CHUNK_SIZE)", _split_text), ("tokens", _split_text_by_tokens)]:
+            chunks = splitter(text)
+
+            start = time.perf_counter()
+            vectors = model.encode(chunks, normalize_embeddings=True, show_progress_bar=False)
+            encode_seconds = time.perf_counter() - start
+
+            spans = _visible_spans(text, chunks, max_tokens)
+            # Same seed per splitter so both are probed with the same sentences
+            rng = random.Random(seed)
+            print(
+                f"  {name:<20} {len(chunks):>4} chunks  encode {encode_seconds:6.2f}s  "
+                f"coverage {_coverage(text, spans):6.1%}  "
+                f"top-1 hit rate {_retrieval_hit_rate(text, vectors, spans, probes, rng):6.1%}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the word-based and token-aware transcript splitters.",
+    )
+    parser.add_argument("paths", nargs="+", help="Plain-text transcript files")
+    parser.add_argument("--probes", type=int, default=50, help="Sentences sampled per file for the retrieval probe")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    benchmark(args.paths, args.probes, args.seed)
@@ -0,0 +1,54 @@
+import argparse
+import logging
+import time
+
+from agents.extractor import run_extractors
+from config import DEFAULT_EXTRACTION_LIMIT, INCREMENTAL_EXTRACTION, YOUTUBE_CACHE_ENABLED
+from services import replay
+from services.http import get_stats as get_http_stats
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+def benchmark(urls: list[str], limit: int, rounds: int) -> None:
+    if YOUTUBE_CACHE_ENABLED or INCREMENTAL_EXTRACTION:
+        logger.warning(
+            "YouTube cache / incremental extraction are enabled: later rounds will skip "
+            "most service calls. Set YOUTUBE_CACHE_ENABLED=false and INCREMENTAL_EXTRACTION=false "
+            "to measure raw extraction throughput."
+        )
+
+    for round_number in range(1, rounds + 1):
+        start = time.perf_counter()
+        results, errors = run_extractors(urls, limit)
+        elapsed = time.perf_counter() - start
+
+        items = sum(len(result.items) for result in results)
+        print(
+            f"round {round_number}: {len(results)}/{len(urls)} sources, {items} items "
+            f"in {elapsed:.2f}s ({items / elapsed if elapsed else 0:.1f} items/s)"
+        )
+        for url, error in errors.items():
+            print(f"  failed {url}: {error}")
+
+    print(f"caption HTTP session: {get_http_stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark extraction throughput, optionally against recorded fixtures.",
+    )
+    parser.add_argument("urls", nargs="+")
+    parser.add_argument("--mode", choices=replay.MODES, help="Override EXTRACTION_REPLAY_MODE")
+    parser.add_argument("--fixtures", help="Override EXTRACTION_FIXTURES_DIR")
+    parser.add_argument("--latency", help=(
+        'Replay latency in ms, e.g. "250" or "ytdlp=800,caption=40"; kinds are ytdlp_channel, '
+        'ytdlp_video (or ytdlp for both), caption and apify'
+    ))
+    parser.add_argument("--limit", type=int, default=DEFAULT_EXTRACTION_LIMIT)
+    parser.add_argument("--rounds", type=int, default=1)
+    args = parser.parse_args()
+
+    replay.configure(mode=args.mode, fixtures_dir=args.fixtures, latency_ms=args.latency)
+    benchmark(args.urls, args.limit, args.rounds)
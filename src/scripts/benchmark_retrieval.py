@@ -0,0 +1,77 @@
+import argparse
+import time
+import uuid
+
+import numpy as np
+
+from config import EMBEDDING_DIMENSIONS, LOCAL_SEARCH_MAX_POINTS, QDRANT_PATH, QDRANT_URL
+from services import qdrant
+from services.retrieval import load_snapshot
+
+# Run against the Qdrant the app uses (QDRANT_URL); an embedded QDRANT_PATH has no
+# network round trip, so it understates the remote cost.
+#
+# A pipeline run issues a handful of batched searches per account collection
+# (strategist insights, writer briefs, rewrites). Local search pays off while
+#   snapshot load time < searches per run * (remote latency - local latency)
+# so the threshold should sit around the largest size where that still holds.
+
+
+def _timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def benchmark(sizes: list[int], queries: int, searches_per_run: int, repeat: int, seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    target = f"embedded Qdrant at {QDRANT_PATH}" if QDRANT_PATH else QDRANT_URL
+    print(
+        f"{target}: {queries} queries per search, {searches_per_run} searches per run "
+        f"(LOCAL_SEARCH_MAX_POINTS={LOCAL_SEARCH_MAX_POINTS})"
+    )
+    print(f"{'points':>8} {'load':>9} {'remote':>9} {'local':>9} {'break-even':>11}  verdict")
+
+    for size in sizes:
+        collection_name = f"benchmark_retrieval_{uuid.uuid4().hex[:8]}"
+        vectors = rng.standard_normal((size, EMBEDDING_DIMENSIONS), dtype=np.float32)
+        chunks = [
+            {"text": f"chunk {i} " + "lorem ipsum dolor " * 60, "url": f"https://example.com/{i}", "views": i}
+            for i in range(size)
+        ]
+        ids = [str(uuid.uuid5(uuid.NAMESPACE_URL, f"benchmark|{i}")) for i in range(size)]
+        query_embeddings = rng.standard_normal((queries, EMBEDDING_DIMENSIONS), dtype=np.float32).tolist()
+
+        qdrant.ensure_collection(collection_name)
+        try:
+            qdrant.upsert_chunks(collection_name, chunks, vectors, ids)
+            load = _timed(lambda: load_snapshot(collection_name), 1)
+            snapshot = load_snapshot(collection_name)
+            remote = _timed(lambda: qdrant.search_batch(collection_name, query_embeddings, limit=5), repeat)
+            local = _timed(lambda: snapshot.search_batch(query_embeddings, limit=5), repeat)
+        finally:
+            qdrant.get_client().delete_collection(collection_name)
+            qdrant.invalidate_schema(collection_name)
+
+        saved = remote - local
+        break_even = load / saved if saved > 0 else float("inf")
+        verdict = "local" if break_even <= searches_per_run else "qdrant"
+        print(
+            f"{size:>8} {load * 1000:>7.1f}ms {remote * 1000:>7.2f}ms {local * 1000:>7.2f}ms "
+            f"{break_even:>8.1f} searches  {verdict}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Find the collection size where in-memory search stops paying for its load time.",
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 1000, 2000, 5000, 10000, 20000])
+    parser.add_argument("--queries", type=int, default=5, help="Queries per batched search")
+    parser.add_argument("--searches-per-run", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    benchmark(args.sizes, args.queries, args.searches_per_run, args.repeat, args.seed)
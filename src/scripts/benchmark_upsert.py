@@ -0,0 +1,86 @@
+import argparse
+import time
+import uuid
+
+import numpy as np
+
+from config import (
+    EMBEDDING_DIMENSIONS,
+    QDRANT_PATH,
+    QDRANT_PREFER_GRPC,
+    QDRANT_UPSERT_BATCH_SIZE,
+    QDRANT_UPSERT_PARALLELISM,
+    QDRANT_URL,
+)
+from services.qdrant import ensure_collection, get_client, invalidate_schema, upsert_chunks
+
+# Point it at a throwaway local Qdrant, e.g.
+#   docker run -p 6333:6333 -p 6334:6334 qdrant/qdrant
+#   QDRANT_URL=http://localhost:6333 [QDRANT_PREFER_GRPC=true] python -m scripts.benchmark_upsert
+# or in-process: QDRANT_PATH=:memory: python -m scripts.benchmark_upsert
+
+
+def _fake_chunks(count: int, seed: int) -> tuple[list[dict], np.ndarray, list[str]]:
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((count, EMBEDDING_DIMENSIONS), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    chunks = [
+        {
+            "text": f"chunk {i} " + "lorem ipsum " * 40,
+            "platform": "youtube",
+            "url": f"https://youtube.com/watch?v={i:011d}",
+            "chunk_type": "transcript",
+            "views": int(rng.integers(0, 1_000_000)),
+        }
+        for i in range(count)
+    ]
+    ids = [str(uuid.uuid5(uuid.NAMESPACE_URL, f"benchmark|{i}")) for i in range(count)]
+    return chunks, vectors, ids
+
+
+def benchmark(points: int, configs: list[tuple[int, int]], seed: int) -> None:
+    client = get_client()
+    chunks, vectors, ids = _fake_chunks(points, seed)
+    if QDRANT_PATH:
+        target = f"embedded Qdrant at {QDRANT_PATH} (parallelism is forced to 1)"
+    else:
+        target = f"{QDRANT_URL} over {'gRPC' if QDRANT_PREFER_GRPC else 'HTTP'}"
+    print(f"{points} points of {EMBEDDING_DIMENSIONS} dims against {target}")
+
+    for batch_size, parallelism in configs:
+        collection_name = f"benchmark_upsert_{uuid.uuid4().hex[:8]}"
+        ensure_collection(collection_name)
+        try:
+            start = time.perf_counter()
+            upsert_chunks(collection_name, chunks, vectors, ids, batch_size=batch_size, parallelism=parallelism)
+            elapsed = time.perf_counter() - start
+            stored = client.count(collection_name, exact=True).count
+        finally:
+            client.delete_collection(collection_name)
+            invalidate_schema(collection_name)
+
+        print(
+            f"  batch {batch_size:>5}  parallelism {parallelism:>2}  {elapsed:7.2f}s  "
+            f"{points / elapsed if elapsed else 0:9.0f} points/s  ({stored} stored)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure Qdrant upsert throughput for different batch sizes and parallelism.",
+    )
+    parser.add_argument("--points", type=int, default=10_000)
+    parser.add_argument(
+        "--batch-sizes", type=int, nargs="+", default=[100, QDRANT_UPSERT_BATCH_SIZE],
+    )
+    parser.add_argument(
+        "--parallelism", type=int, nargs="+", default=[1, QDRANT_UPSERT_PARALLELISM],
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    benchmark(
+        args.points,
+        [(batch_size, parallelism) for batch_size in args.batch_sizes for parallelism in args.parallelism],
+        args.seed,
+    )
@@ -7,6 +7,7 @@ import uuid
 from agents.extractor import run_extractor
 from models.content import ExtractionResult
 from services.embeddings import generate_embeddings
+from services.framework_library import bump_library_version
 from services.llm import generate
 from services.qdrant import ensure_viral_frameworks_collection, upsert_viral_framework
 
@@ -120,6 +121,14 @@ def _generate_with_retry(prompt: str, max_retries: int = 5) -> str:
 def ingest(urls: list[str]) -> None:
     ensure_viral_frameworks_collection()
 
+    try:
+        _ingest_urls(urls)
+    finally:
+        # Even a partial ingest changed the library: invalidate cached search results
+        bump_library_version()
+
+
+def _ingest_urls(urls: list[str]) -> None:
     for url in urls:
         logger.info("Processing URL: %s", url)
 
@@ -0,0 +1,54 @@
+import argparse
+import logging
+
+from services.qdrant import STORAGE_PROFILES, apply_storage_profile, get_client
+
+logging.basicConfig(level=logging.INFO)
+
+FRAMEWORKS_COLLECTION = "viral_frameworks"
+
+
+def _describe(collection_name: str) -> str:
+    info = get_client().get_collection(collection_name)
+    config = info.config
+    return (
+        f"{info.points_count or 0} points, "
+        f"quantization={'int8' if config.quantization_config else 'off'}, "
+        f"on_disk_vectors={bool(config.params.vectors.on_disk)}, "
+        f"on_disk_payload={config.params.on_disk_payload}, "
+        f"hnsw m={config.hnsw_config.m} ef_construct={config.hnsw_config.ef_construct}"
+    )
+
+
+def migrate(profile: str, collections: list[str], dry_run: bool) -> None:
+    for collection_name in collections:
+        print(f"{collection_name}: {_describe(collection_name)}")
+        if dry_run:
+            continue
+        apply_storage_profile(collection_name, profile)
+        print(f"  -> {_describe(collection_name)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Move existing Qdrant collections to a storage profile.",
+    )
+    parser.add_argument("profile", choices=list(STORAGE_PROFILES))
+    parser.add_argument("collections", nargs="*", help="Collections to migrate")
+    parser.add_argument(
+        "--accounts", action="store_true",
+        help=f"Migrate every account collection (all except {FRAMEWORKS_COLLECTION})",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Only print the current settings")
+    args = parser.parse_args()
+
+    collections = list(args.collections)
+    if args.accounts:
+        collections += [
+            c.name for c in get_client().get_collections().collections
+            if c.name != FRAMEWORKS_COLLECTION and c.name not in collections
+        ]
+    if not collections:
+        parser.error("pass collection names or --accounts")
+
+    migrate(args.profile, collections, args.dry_run)
@@ -1,105 +1,260 @@
+import json
 import logging
+import threading
+import time
+from collections.abc import Iterator
 from datetime import datetime, timezone
 
 from apify_client import ApifyClient
 
-from config import APIFY_API_TOKEN
+from config import APIFY_API_TOKEN, APIFY_PAGE_SIZE, APIFY_POLL_INTERVAL, APIFY_RUN_TIMEOUT
+from services import replay
 
 logger = logging.getLogger(__name__)
 
 INSTAGRAM_ACTOR = "apify/instagram-post-scraper"
 TIKTOK_ACTOR = "clockworks/tiktok-scraper"
 
+TERMINAL_STATUSES = {"SUCCEEDED", "FAILED", "TIMED-OUT", "ABORTED"}
+
+_client: ApifyClient | None = None
+_client_lock = threading.Lock()
+
 
 def _get_client() -> ApifyClient:
-    if not APIFY_API_TOKEN:
-        raise ValueError("APIFY_API_TOKEN is not set. Add it to your .env file.")
-    return ApifyClient(APIFY_API_TOKEN)
+    global _client
+    if _client is None:
+        if not APIFY_API_TOKEN:
+            raise ValueError("APIFY_API_TOKEN is not set. Add it to your .env file.")
+        with _client_lock:
+            if _client is None:
+                _client = ApifyClient(APIFY_API_TOKEN)
+    return _client
+
 
+# --- Actor inputs and item parsers ---
 
-def scrape_instagram(username: str, limit: int) -> list[dict]:
-    client = _get_client()
 
+def _instagram_input(username: str, limit: int, newer_than: datetime | None) -> dict:
     run_input = {
         "username": [username],
         "resultsLimit": limit,
     }
+    if newer_than:
+        run_input["onlyPostsNewerThan"] = newer_than.date().isoformat()
+    return run_input
 
-    logger.info("Running Instagram scraper for @%s (limit=%d)", username, limit)
-    run = client.actor(INSTAGRAM_ACTOR).call(run_input=run_input)
-
-    items = []
-    for item in client.dataset(run["defaultDatasetId"]).iterate_items():
-        published_at = None
-        if item.get("timestamp"):
-            try:
-                published_at = datetime.fromisoformat(item["timestamp"])
-            except (ValueError, TypeError):
-                pass
-
-        post_type = item.get("type", "image")
-        if post_type == "Sidecar":
-            post_type = "carousel"
-        elif post_type == "Video":
-            post_type = "reel"
-        else:
-            post_type = "image"
 
-        items.append({
-            "description": item.get("caption", ""),
-            "url": item.get("url", ""),
-            "views": item.get("videoPlayCount"),
-            "likes": item.get("likesCount"),
-            "comments": item.get("commentsCount"),
-            "hashtags": item.get("hashtags", []),
-            "published_at": published_at,
-            "content_type": post_type,
-        })
+def _parse_instagram_item(item: dict) -> dict:
+    published_at = None
+    if item.get("timestamp"):
+        try:
+            published_at = datetime.fromisoformat(item["timestamp"])
+        except (ValueError, TypeError):
+            pass
 
-    return items
+    post_type = item.get("type", "image")
+    if post_type == "Sidecar":
+        post_type = "carousel"
+    elif post_type == "Video":
+        post_type = "reel"
+    else:
+        post_type = "image"
 
+    return {
+        "description": item.get("caption", ""),
+        "url": item.get("url", ""),
+        "views": item.get("videoPlayCount"),
+        "likes": item.get("likesCount"),
+        "comments": item.get("commentsCount"),
+        "hashtags": item.get("hashtags", []),
+        "published_at": published_at,
+        "content_type": post_type,
+    }
 
-def scrape_tiktok(username: str, limit: int) -> list[dict]:
-    client = _get_client()
 
+def _tiktok_input(username: str, limit: int, newer_than: datetime | None) -> dict:
     run_input = {
         "profiles": [username],
         "resultsPerPage": limit,
         "excludePinnedPosts": False,
         "shouldDownloadCovers": False,
     }
+    if newer_than:
+        run_input["oldestPostDateUnified"] = newer_than.date().isoformat()
+    return run_input
+
+
+def _parse_tiktok_item(item: dict) -> dict:
+    published_at = None
+    create_time = item.get("createTime")
+    if create_time:
+        try:
+            published_at = datetime.fromtimestamp(int(create_time), tz=timezone.utc)
+        except (ValueError, TypeError, OSError):
+            pass
+
+    hashtags = []
+    for tag in item.get("hashtags", []):
+        if isinstance(tag, dict):
+            hashtags.append(tag.get("name", ""))
+        else:
+            hashtags.append(str(tag))
+
+    return {
+        "description": item.get("text", "") or item.get("description", ""),
+        "url": item.get("webVideoUrl", ""),
+        "views": item.get("playCount"),
+        "likes": item.get("diggCount"),
+        "comments": item.get("commentCount"),
+        "shares": item.get("shareCount"),
+        "hashtags": [h for h in hashtags if h],
+        "published_at": published_at,
+        "content_type": "video",
+        "duration": item.get("videoMeta", {}).get("duration"),
+    }
+
+
+_SCRAPERS = {
+    "instagram": (INSTAGRAM_ACTOR, _instagram_input, _parse_instagram_item),
+    "tiktok": (TIKTOK_ACTOR, _tiktok_input, _parse_tiktok_item),
+}
+
+
+# --- Start / poll / collect ---
+
+
+def start_scrape(
+    platform: str,
+    username: str,
+    limit: int,
+    newer_than: datetime | None = None,
+) -> dict:
+    """Start the platform's actor without waiting for it and return the run object."""
+    actor_id, build_input, _ = _SCRAPERS[platform]
+    run_input = build_input(username, limit, newer_than)
+    replay_key = f"{actor_id} {json.dumps(run_input, sort_keys=True)}"
 
-    logger.info("Running TikTok scraper for @%s (limit=%d)", username, limit)
-    run = client.actor(TIKTOK_ACTOR).call(run_input=run_input)
+    if replay.is_replaying():
+        return {"id": f"replay:{replay_key}", "status": "SUCCEEDED", "replay_key": replay_key}
 
-    items = []
-    for item in client.dataset(run["defaultDatasetId"]).iterate_items():
-        published_at = None
-        create_time = item.get("createTime")
-        if create_time:
+    logger.info("Starting %s scraper for @%s (limit=%d)", platform, username, limit)
+    run = _get_client().actor(actor_id).start(run_input=run_input)
+    return {**run, "replay_key": replay_key}
+
+
+def iter_finished_runs(
+    runs: list[dict],
+    poll_interval: float = APIFY_POLL_INTERVAL,
+    timeout: float = APIFY_RUN_TIMEOUT,
+) -> Iterator[tuple[int, dict]]:
+    """Poll several in-flight runs together, yielding ``(input index, final run)`` as each finishes.
+
+    Runs still going after ``timeout`` seconds are aborted and yielded as TIMED-OUT.
+    A run whose status cannot be fetched is yielded as FAILED with the ``error``,
+    so one bad poll never fails the other runs.
+    """
+    pending: dict[int, dict] = {}
+    for index, run in enumerate(runs):
+        if run.get("status") in TERMINAL_STATUSES:
+            yield index, run
+        else:
+            pending[index] = run
+    deadline = time.monotonic() + timeout
+
+    while pending:
+        client = _get_client()
+        for index in list(pending):
             try:
-                published_at = datetime.fromtimestamp(int(create_time), tz=timezone.utc)
-            except (ValueError, TypeError, OSError):
-                pass
-
-        hashtags = []
-        for tag in item.get("hashtags", []):
-            if isinstance(tag, dict):
-                hashtags.append(tag.get("name", ""))
+                run = {**pending[index], **(client.run(pending[index]["id"]).get() or {})}
+            except Exception as exc:
+                logger.warning("Polling Apify run %s failed: %s", pending[index]["id"], exc)
+                run = {**pending[index], "status": "FAILED", "error": str(exc)}
+            if run.get("status") in TERMINAL_STATUSES:
+                del pending[index]
+                yield index, run
             else:
-                hashtags.append(str(tag))
-
-        items.append({
-            "description": item.get("text", "") or item.get("description", ""),
-            "url": item.get("webVideoUrl", ""),
-            "views": item.get("playCount"),
-            "likes": item.get("diggCount"),
-            "comments": item.get("commentCount"),
-            "shares": item.get("shareCount"),
-            "hashtags": [h for h in hashtags if h],
-            "published_at": published_at,
-            "content_type": "video",
-            "duration": item.get("videoMeta", {}).get("duration"),
-        })
-
-    return items
+                pending[index] = run
+        if not pending:
+            return
+        if time.monotonic() >= deadline:
+            for index, run in pending.items():
+                logger.warning("Apify run %s exceeded %ss, aborting", run["id"], timeout)
+                try:
+                    client.run(run["id"]).abort()
+                except Exception as exc:
+                    logger.warning("Aborting Apify run %s failed: %s", run["id"], exc)
+                yield index, {**run, "status": "TIMED-OUT"}
+            return
+        time.sleep(poll_interval)
+
+
+def wait_for_runs(
+    runs: list[dict],
+    poll_interval: float = APIFY_POLL_INTERVAL,
+    timeout: float = APIFY_RUN_TIMEOUT,
+) -> list[dict]:
+    """Wait for several in-flight runs and return the final run objects in input order."""
+    finished = dict(iter_finished_runs(runs, poll_interval, timeout))
+    return [finished[index] for index in range(len(runs))]
+
+
+def iter_dataset_items(dataset_id: str, page_size: int = APIFY_PAGE_SIZE) -> Iterator[dict]:
+    """Yield a dataset's items page by page instead of loading it at once."""
+    dataset = _get_client().dataset(dataset_id)
+    offset = 0
+    while True:
+        page = dataset.list_items(offset=offset, limit=page_size)
+        yield from page.items
+        offset += len(page.items)
+        if not page.items or offset >= page.total:
+            return
+
+
+def collect_scrape(platform: str, run: dict) -> list[dict]:
+    """Parse the dataset of a finished run. Raises if the run did not succeed."""
+    if run.get("status") != "SUCCEEDED":
+        detail = f": {run['error']}" if run.get("error") else ""
+        raise RuntimeError(
+            f"Apify {platform} run {run.get('id')} ended with status {run.get('status')}{detail}"
+        )
+    _, _, parse_item = _SCRAPERS[platform]
+    raw_items = replay.recorded(
+        "apify", run["replay_key"], lambda: list(iter_dataset_items(run["defaultDatasetId"])),
+    )
+    return [parse_item(item) for item in raw_items]
+
+
+def scrape_profiles(
+    profiles: list[tuple[str, str, datetime | None]],
+    limit: int,
+) -> Iterator[tuple[int, list[dict] | Exception]]:
+    """Scrape several (platform, username, newer_than) profiles with all actor runs in flight at once.
+
+    Yields ``(input index, parsed items)`` as each run finishes, or the exception
+    raised while starting or collecting that profile's run.
+    """
+    started: dict[int, dict] = {}
+    for index, (platform, username, newer_than) in enumerate(profiles):
+        try:
+            started[index] = start_scrape(platform, username, limit, newer_than)
+        except Exception as exc:
+            yield index, exc
+
+    indexes = list(started)
+    for position, run in iter_finished_runs([started[index] for index in indexes]):
+        index = indexes[position]
+        try:
+            yield index, collect_scrape(profiles[index][0], run)
+        except Exception as exc:
+            yield index, exc
+
+
+def scrape_instagram(username: str, limit: int, newer_than: datetime | None = None) -> list[dict]:
+    run = wait_for_runs([start_scrape("instagram", username, limit, newer_than)])[0]
+    return collect_scrape("instagram", run)
+
+
+def scrape_tiktok(username: str, limit: int, newer_than: datetime | None = None) -> list[dict]:
+    run = wait_for_runs([start_scrape("tiktok", username, limit, newer_than)])[0]
+    return collect_scrape("tiktok", run)
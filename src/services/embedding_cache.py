@@ -0,0 +1,119 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from config import EMBEDDING_CACHE_DB_PATH, EMBEDDING_CACHE_MAX_ENTRIES
+
+logger = logging.getLogger(__name__)
+
+_EVICT_EVERY_N_WRITES = 1000
+_SQLITE_MAX_PARAMS = 500
+
+_conn: sqlite3.Connection | None = None
+_lock = threading.Lock()
+_writes_since_evict = 0
+_stats = {"hits": 0, "misses": 0}
+
+
+def _get_conn() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        db_path = Path(EMBEDDING_CACHE_DB_PATH)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        _conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                last_accessed REAL NOT NULL
+            )"""
+        )
+        _conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_accessed ON embeddings (last_accessed)"
+        )
+        _conn.commit()
+        _evict(_conn)
+    return _conn
+
+
+def _evict(conn: sqlite3.Connection) -> None:
+    """Drop the least recently used vectors beyond EMBEDDING_CACHE_MAX_ENTRIES."""
+    evicted = conn.execute(
+        """DELETE FROM embeddings WHERE key IN (
+            SELECT key FROM embeddings ORDER BY last_accessed DESC LIMIT -1 OFFSET ?
+        )""",
+        (EMBEDDING_CACHE_MAX_ENTRIES,),
+    ).rowcount
+    conn.commit()
+    if evicted:
+        logger.info("Embedding cache evicted %d LRU entries", evicted)
+
+
+def _key(model_name: str, text: str) -> str:
+    return f"{model_name}:{hashlib.sha256(text.encode()).hexdigest()}"
+
+
+def get_many(model_name: str, texts: list[str]) -> list[np.ndarray | None]:
+    """Return the cached float32 vector for each text, or None on a miss."""
+    keys = [_key(model_name, text) for text in texts]
+    found: dict[str, np.ndarray] = {}
+    now = time.time()
+
+    with _lock:
+        conn = _get_conn()
+        unique_keys = list(dict.fromkeys(keys))
+        for start in range(0, len(unique_keys), _SQLITE_MAX_PARAMS):
+            batch = unique_keys[start : start + _SQLITE_MAX_PARAMS]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                batch,
+            ).fetchall()
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+        if found:
+            conn.executemany(
+                "UPDATE embeddings SET last_accessed = ? WHERE key = ?",
+                [(now, key) for key in found],
+            )
+            conn.commit()
+
+        hits = sum(1 for key in keys if key in found)
+        _stats["hits"] += hits
+        _stats["misses"] += len(keys) - hits
+
+    return [found.get(key) for key in keys]
+
+
+def put_many(model_name: str, texts: list[str], vectors: np.ndarray) -> None:
+    """Store one float32 vector per text."""
+    global _writes_since_evict
+    now = time.time()
+    rows = [
+        (_key(model_name, text), np.asarray(vector, dtype=np.float32).tobytes(), now)
+        for text, vector in zip(texts, vectors)
+    ]
+
+    with _lock:
+        conn = _get_conn()
+        conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)", rows)
+        conn.commit()
+
+        _writes_since_evict += len(rows)
+        if _writes_since_evict >= _EVICT_EVERY_N_WRITES:
+            _writes_since_evict = 0
+            _evict(conn)
+
+
+def get_stats() -> dict:
+    with _lock:
+        stats = dict(_stats)
+    total = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / total if total else 0.0
+    return stats
@@ -1,18 +1,244 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
 from sentence_transformers import SentenceTransformer
 
-from config import EMBEDDING_MODEL
+from config import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_BATCH_TOKENS,
+    EMBEDDING_CACHE_ENABLED,
+    EMBEDDING_MAX_BATCH_SIZE,
+    EMBEDDING_MODEL,
+    EMBEDDING_ONNX_FILE,
+    EMBEDDING_PARITY_PATH,
+    EMBEDDING_PARITY_THRESHOLD,
+    EMBEDDING_POOL_MIN_TEXTS,
+    EMBEDDING_WORKERS,
+)
+from services import embedding_cache
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (in tokens, special tokens included) of the length buckets
+_BUCKET_BOUNDS = (32, 64, 128, 256, 512)
+
+# Short and long, Spanish and English samples, close to what gets indexed
+_PARITY_FIXTURES = [
+    "Cómo ahorrar el 30% de tu sueldo sin dejar de salir con amigos",
+    "3 errores que cometes al invertir en bolsa por primera vez",
+    "POV: tu jefe te pide quedarte otra hora y tú ya tenías planes",
+    "Hoy os enseño mi rutina de mañana para ser más productivo. Me levanto a las seis, "
+    "bebo agua, hago diez minutos de estiramientos y repaso las tres tareas más importantes del día.",
+    "This is the exact hook formula I used to go from 0 to 100k followers in six months",
+    "Receta fácil de pasta cremosa en 15 minutos #recetas #cocina",
+    "Nadie te cuenta esto sobre emprender: los primeros dos años vas a ganar menos que en tu trabajo.",
+    "Why most fitness advice online is wrong, and what the research actually says about building muscle",
+]
 
 _model: SentenceTransformer | None = None
+_model_key = EMBEDDING_MODEL
+_pool: dict | None = None
+_pool_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"texts": 0, "seconds": 0.0}
+
+
+def _read_parity() -> dict[str, float]:
+    try:
+        return json.loads(Path(EMBEDDING_PARITY_PATH).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _write_parity(key: str, agreement: float) -> None:
+    results = {**_read_parity(), key: agreement}
+    path = Path(EMBEDDING_PARITY_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def _check_parity(model: SentenceTransformer) -> float:
+    """Min cosine between ``model`` and the torch model on the parity fixtures."""
+    reference = SentenceTransformer(EMBEDDING_MODEL)
+    expected = reference.encode(_PARITY_FIXTURES, normalize_embeddings=True, show_progress_bar=False)
+    actual = model.encode(_PARITY_FIXTURES, normalize_embeddings=True, show_progress_bar=False)
+    return float(np.min(np.sum(expected * actual, axis=1)))
+
+
+def _load_onnx_model(key: str) -> SentenceTransformer | None:
+    """Load the quantized ONNX export, or None if it fails the parity check against torch.
+
+    The check loads the torch model too, so it only runs the first time a
+    (model, ONNX file) pair is used; its result is kept in EMBEDDING_PARITY_PATH.
+    """
+    agreement = _read_parity().get(key)
+    if agreement is None or agreement >= EMBEDDING_PARITY_THRESHOLD:
+        try:
+            model = SentenceTransformer(
+                EMBEDDING_MODEL, backend="onnx", model_kwargs={"file_name": EMBEDDING_ONNX_FILE},
+            )
+        except Exception as e:
+            logger.warning("Could not load ONNX embedding model %s (%s), using torch", EMBEDDING_ONNX_FILE, e)
+            return None
+        if agreement is None:
+            logger.info("Checking ONNX embedding model %s against torch", EMBEDDING_ONNX_FILE)
+            agreement = _check_parity(model)
+            _write_parity(key, agreement)
+
+    if agreement < EMBEDDING_PARITY_THRESHOLD:
+        logger.warning(
+            "ONNX embedding model %s failed parity check (min cosine %.4f < %.4f), using torch",
+            EMBEDDING_ONNX_FILE, agreement, EMBEDDING_PARITY_THRESHOLD,
+        )
+        return None
+
+    logger.info("Using ONNX embedding model %s (min cosine vs torch %.4f)", EMBEDDING_ONNX_FILE, agreement)
+    return model
 
 
 def get_model() -> SentenceTransformer:
-    global _model
+    global _model, _model_key
     if _model is None:
-        _model = SentenceTransformer(EMBEDDING_MODEL)
+        model = None
+        if EMBEDDING_BACKEND == "onnx":
+            onnx_key = f"{EMBEDDING_MODEL}@onnx:{EMBEDDING_ONNX_FILE}"
+            model = _load_onnx_model(onnx_key)
+            if model is not None:
+                _model_key = onnx_key
+        _model = model if model is not None else SentenceTransformer(EMBEDDING_MODEL)
     return _model
 
 
-def generate_embeddings(texts: list[str]) -> list[list[float]]:
+def get_model_key() -> str:
+    """Identifies the loaded model and backend, so cached vectors never mix backends."""
+    get_model()
+    return _model_key
+
+
+def get_tokenizer():
+    return get_model().tokenizer
+
+
+def get_max_seq_length() -> int:
+    """Max tokens (including special tokens) the model reads before truncating."""
+    return get_model().max_seq_length
+
+
+def _get_pool() -> dict | None:
+    """Multi-process pool shared by large encodes, started on first use."""
+    global _pool
+    if EMBEDDING_WORKERS <= 1:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            logger.info("Starting embedding pool with %d CPU workers", EMBEDDING_WORKERS)
+            _pool = get_model().start_multi_process_pool(["cpu"] * EMBEDDING_WORKERS)
+            atexit.register(_stop_pool)
+        return _pool
+
+
+def _stop_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            SentenceTransformer.stop_multi_process_pool(_pool)
+            _pool = None
+
+
+def _length_buckets(texts: list[str]) -> list[tuple[int, list[int]]]:
+    """Group text indices by token length as (bucket bound, indices), shortest bucket first."""
+    model = get_model()
+    lengths = [
+        len(ids)
+        for ids in model.tokenizer(texts, truncation=True, max_length=model.max_seq_length)["input_ids"]
+    ]
+    buckets: dict[int, list[int]] = {}
+    for index in sorted(range(len(texts)), key=lengths.__getitem__):
+        bound = next((b for b in _BUCKET_BOUNDS if lengths[index] <= b), _BUCKET_BOUNDS[-1])
+        buckets.setdefault(bound, []).append(index)
+    return sorted(buckets.items())
+
+
+def _batch_size(bucket_bound: int) -> int:
+    return max(1, min(EMBEDDING_MAX_BATCH_SIZE, EMBEDDING_BATCH_TOKENS // bucket_bound))
+
+
+def _encode(texts: list[str]) -> np.ndarray:
+    """Encode ``texts`` into float32 vectors, returned in input order.
+
+    Texts are bucketed by token length so each batch pads to a similar size, and
+    shorter buckets get proportionally larger batches. Large inputs are spread
+    over the multi-process pool when EMBEDDING_WORKERS > 1.
+    """
     model = get_model()
-    embeddings = model.encode(texts, show_progress_bar=False)
-    return embeddings.tolist()
+    if not texts:
+        return np.empty((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+
+    start = time.perf_counter()
+    pool = _get_pool() if len(texts) >= EMBEDDING_POOL_MIN_TEXTS else None
+    vectors = np.empty((len(texts), model.get_sentence_embedding_dimension()), dtype=np.float32)
+
+    for bound, indices in _length_buckets(texts):
+        batch_size = _batch_size(bound)
+        vectors[indices] = model.encode(
+            [texts[i] for i in indices],
+            batch_size=batch_size,
+            pool=pool,
+            chunk_size=batch_size * 4 if pool else None,
+            show_progress_bar=False,
+        )
+
+    elapsed = time.perf_counter() - start
+    with _stats_lock:
+        _stats["texts"] += len(texts)
+        _stats["seconds"] += elapsed
+    logger.info(
+        "Encoded %d texts in %.2fs (%.1f chunks/s%s)",
+        len(texts), elapsed, len(texts) / elapsed if elapsed else 0.0,
+        f", {EMBEDDING_WORKERS} workers" if pool else "",
+    )
+    return vectors
+
+
+def get_stats() -> dict:
+    """Cumulative encode throughput of this process."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["chunks_per_second"] = stats["texts"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+
+def embed(texts: list[str]) -> np.ndarray:
+    """Embed ``texts`` into a contiguous float32 array of shape (len(texts), dimensions)."""
+    if not EMBEDDING_CACHE_ENABLED or not texts:
+        return _encode(texts)
+
+    model_key = get_model_key()
+    cached = embedding_cache.get_many(model_key, texts)
+    missing = list(dict.fromkeys(text for text, vector in zip(texts, cached) if vector is None))
+
+    if not missing:
+        return np.vstack(cached)
+
+    logger.info("Embedding cache: %d hits, encoding %d new texts", len(texts) - len(missing), len(missing))
+    encoded = _encode(missing)
+    embedding_cache.put_many(model_key, missing, encoded)
+
+    vectors = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+    row_of = {text: row for row, text in enumerate(missing)}
+    for i, (text, vector) in enumerate(zip(texts, cached)):
+        vectors[i] = encoded[row_of[text]] if vector is None else vector
+    return vectors
+
+
+def generate_embeddings(texts: list[str]) -> list[list[float]]:
+    """List-of-lists wrapper around ``embed`` for callers that need plain Python floats."""
+    return embed(texts).tolist()
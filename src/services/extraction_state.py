@@ -0,0 +1,78 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from config import EXTRACTION_STATE_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+_conn: sqlite3.Connection | None = None
+_lock = threading.Lock()
+
+
+def _get_conn() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        db_path = Path(EXTRACTION_STATE_DB_PATH)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        _conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        _conn.execute(
+            """CREATE TABLE IF NOT EXISTS accounts (
+                platform TEXT NOT NULL,
+                username TEXT NOT NULL,
+                watermark TEXT,
+                items_json TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (platform, username)
+            )"""
+        )
+        _conn.commit()
+    return _conn
+
+
+def load_account(platform: str, username: str) -> tuple[datetime | None, list[dict]]:
+    """Return the newest published_at seen for an account and its stored items.
+
+    Returns (None, []) for accounts that were never extracted.
+    """
+    with _lock:
+        row = _get_conn().execute(
+            "SELECT watermark, items_json FROM accounts WHERE platform = ? AND username = ?",
+            (platform, username),
+        ).fetchone()
+
+    if row is None:
+        return None, []
+
+    watermark, items_json = row
+    return (datetime.fromisoformat(watermark) if watermark else None), json.loads(items_json)
+
+
+def save_account(
+    platform: str,
+    username: str,
+    watermark: datetime | None,
+    items: list[dict],
+) -> None:
+    """Persist the watermark and the JSON-serializable items of an account."""
+    with _lock:
+        conn = _get_conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO accounts VALUES (?, ?, ?, ?, ?)",
+            (
+                platform,
+                username,
+                watermark.isoformat() if watermark else None,
+                json.dumps(items),
+                time.time(),
+            ),
+        )
+        conn.commit()
+    logger.info(
+        "Saved extraction state for %s/@%s (%d items, watermark=%s)",
+        platform, username, len(items), watermark,
+    )
@@ -0,0 +1,131 @@
+import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+
+import numpy as np
+
+from config import (
+    EMBEDDING_DIMENSIONS,
+    VIRAL_CACHE_ENABLED,
+    VIRAL_CACHE_HASH_BITS,
+    VIRAL_CACHE_MAX_ENTRIES,
+    VIRAL_LIBRARY_IN_MEMORY,
+)
+from services.framework_library import get_library, read_library_version
+from services.qdrant import search_viral_frameworks_batch
+
+logger = logging.getLogger(__name__)
+
+# Random hyperplanes for SimHash bucketing: near-identical query vectors share a bucket
+_HYPERPLANES = np.random.default_rng(20240917).standard_normal(
+    (VIRAL_CACHE_HASH_BITS, EMBEDDING_DIMENSIONS),
+).astype(np.float32)
+_BIT_WEIGHTS = 1 << np.arange(VIRAL_CACHE_HASH_BITS, dtype=np.uint64)
+
+_lock = threading.Lock()
+_version: str | None = None
+_results: OrderedDict[tuple, list[dict]] = OrderedDict()
+_stats = {"hits": 0, "misses": 0}
+
+
+def _vector_bucket(embedding: list[float]) -> int:
+    bits = (_HYPERPLANES @ np.asarray(embedding, dtype=np.float32)) > 0
+    return int(bits.astype(np.uint64) @ _BIT_WEIGHTS)
+
+
+def _backend() -> tuple[str, Callable[..., list[list[dict]]]]:
+    """(library version, batched search) for the in-memory library or Qdrant."""
+    if VIRAL_LIBRARY_IN_MEMORY:
+        library = get_library()
+        return library.version, library.search
+    return read_library_version(), lambda q, f, limit, include, exclude: search_viral_frameworks_batch(
+        q, f, limit, strict=True, include=include, exclude=exclude,
+    )
+
+
+def search_frameworks(
+    query_embeddings: list[list[float]],
+    facets: list[tuple[str, str, str | None]],
+    limit: int = 2,
+    include: list[str] | None = None,
+    exclude: list[str] | None = None,
+) -> list[list[dict]]:
+    """Cached viral frameworks search, one (objetivo, plataforma, tono) facet per query.
+
+    Searches the in-memory library (or Qdrant with VIRAL_LIBRARY_IN_MEMORY=false).
+    Results are cached per (objetivo, plataforma, tono, query vector bucket) until
+    the library version changes; all misses are searched in one batch. Failed
+    searches return empty results and are not cached. ``include``/``exclude``
+    project the returned payloads.
+    """
+    try:
+        version, search = _backend()
+    except Exception as exc:
+        logger.warning("viral_frameworks library unavailable (%s), skipping", exc)
+        return [[] for _ in query_embeddings]
+
+    if not VIRAL_CACHE_ENABLED:
+        try:
+            return search(query_embeddings, facets, limit, include, exclude)
+        except Exception as exc:
+            logger.warning("viral_frameworks search failed (%s), skipping", exc)
+            return [[] for _ in query_embeddings]
+
+    global _version
+    projection = (tuple(include or ()), tuple(exclude or ()), include is None, exclude is None)
+    keys = [
+        (*facet, _vector_bucket(embedding), limit, projection)
+        for facet, embedding in zip(facets, query_embeddings)
+    ]
+
+    with _lock:
+        if version != _version:
+            if _results:
+                logger.info("Viral frameworks library changed, dropping %d cached results", len(_results))
+            _results.clear()
+            _version = version
+        cached = {key: _results[key] for key in keys if key in _results}
+        for key in cached:
+            _results.move_to_end(key)
+        _stats["hits"] += sum(1 for key in keys if key in cached)
+        _stats["misses"] += sum(1 for key in keys if key not in cached)
+
+    # One query per distinct missing key
+    missing: dict[tuple, int] = {}
+    for i, key in enumerate(keys):
+        if key not in cached:
+            missing.setdefault(key, i)
+    if missing:
+        indexes = list(missing.values())
+        try:
+            fetched = search(
+                [query_embeddings[i] for i in indexes],
+                [facets[i] for i in indexes],
+                limit,
+                include,
+                exclude,
+            )
+        except Exception as exc:
+            logger.warning("viral_frameworks search failed (%s), skipping", exc)
+            fetched = None
+
+        if fetched is not None:
+            with _lock:
+                if _version == version:
+                    for key, results in zip(missing, fetched):
+                        _results[key] = results
+                    while len(_results) > VIRAL_CACHE_MAX_ENTRIES:
+                        _results.popitem(last=False)
+            cached.update(zip(missing, fetched))
+
+    return [cached.get(key, []) for key in keys]
+
+
+def get_stats() -> dict:
+    with _lock:
+        stats = dict(_stats)
+        stats["entries"] = len(_results)
+    total = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / total if total else 0.0
+    return stats
@@ -0,0 +1,140 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+from config import VIRAL_FRAMEWORKS_VERSION_PATH
+from services.qdrant import load_points, local_scores, local_top_hits
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAME = "viral_frameworks"
+FACET_FIELDS = ("objetivo", "plataforma", "tono_predominante")
+
+
+def read_library_version() -> str:
+    """Current version stamp of the viral frameworks library ("" before the first ingest)."""
+    try:
+        return Path(VIRAL_FRAMEWORKS_VERSION_PATH).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return ""
+
+
+def bump_library_version() -> str:
+    """Write a new version stamp; call after the library changes."""
+    version = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+    path = Path(VIRAL_FRAMEWORKS_VERSION_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(version, encoding="utf-8")
+    os.replace(tmp_path, path)
+    logger.info("Viral frameworks library version is now %s", version)
+    return version
+
+
+class FrameworkLibrary:
+    """Snapshot of the viral_frameworks collection searchable without Qdrant.
+
+    Vectors are kept as a normalized float32 matrix, and each ``metadata.<facet>``
+    value maps to the sorted row indexes holding it.
+    """
+
+    def __init__(self, version: str, payloads: list[dict], vectors: np.ndarray):
+        self.version = version
+        self.payloads = payloads
+        self.vectors = vectors
+        self._facets: dict[tuple[str, str], np.ndarray] = {}
+
+        rows_by_value: dict[tuple[str, str], list[int]] = {}
+        for row, payload in enumerate(payloads):
+            metadata = payload.get("metadata") or {}
+            for field in FACET_FIELDS:
+                value = metadata.get(field)
+                if isinstance(value, str):
+                    rows_by_value.setdefault((field, value), []).append(row)
+        for key, rows in rows_by_value.items():
+            self._facets[key] = np.asarray(rows, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.payloads)
+
+    def _rows(self, objetivo: str, plataforma: str, tono: str | None) -> np.ndarray:
+        empty = np.empty(0, dtype=np.int64)
+        rows = np.intersect1d(
+            self._facets.get(("objetivo", objetivo), empty),
+            self._facets.get(("plataforma", plataforma), empty),
+            assume_unique=True,
+        )
+        if tono:
+            rows = np.intersect1d(rows, self._facets.get(("tono_predominante", tono), empty), assume_unique=True)
+        return rows
+
+    def search(
+        self,
+        query_embeddings: list[list[float]],
+        facets: list[tuple[str, str, str | None]],
+        limit: int = 2,
+        include: list[str] | None = None,
+        exclude: list[str] | None = None,
+    ) -> list[list[dict]]:
+        """Same semantics as ``qdrant.search_viral_frameworks_batch``, computed locally."""
+        if not query_embeddings or not len(self):
+            return [[] for _ in query_embeddings]
+
+        scores = local_scores(query_embeddings, self.vectors)
+
+        results = []
+        for query_scores, (objetivo, plataforma, tono) in zip(scores, facets):
+            rows = self._rows(objetivo, plataforma, tono)
+            if not len(rows) and tono:
+                rows = self._rows(objetivo, plataforma, None)
+            results.append(local_top_hits(query_scores, rows, limit, self.payloads, include, exclude))
+        return results
+
+
+def load_library(version: str | None = None) -> FrameworkLibrary:
+    """Read every point of the collection (payloads and vectors) into memory."""
+    version = read_library_version() if version is None else version
+    payloads, matrix = load_points(COLLECTION_NAME, page_size=256)
+    logger.info("Loaded %d viral frameworks into memory (version %s)", len(payloads), version or "-")
+    return FrameworkLibrary(version, payloads, matrix)
+
+
+_library: FrameworkLibrary | None = None
+_load_lock = threading.Lock()
+_reloading = False
+
+
+def _reload_in_background(version: str) -> None:
+    global _library, _reloading
+    try:
+        _library = load_library(version)
+    except Exception as exc:
+        logger.warning("Background reload of viral frameworks failed (%s), keeping previous library", exc)
+    finally:
+        with _load_lock:
+            _reloading = False
+
+
+def get_library() -> FrameworkLibrary:
+    """Return the in-memory library, loading it on first use.
+
+    When the version stamp changes (a new ingest), a reload starts on a background
+    thread and the previous snapshot keeps serving searches until it completes.
+    """
+    global _library, _reloading
+    version = read_library_version()
+
+    with _load_lock:
+        if _library is None:
+            _library = load_library(version)
+        elif _library.version != version and not _reloading:
+            _reloading = True
+            threading.Thread(
+                target=_reload_in_background, args=(version,), name="framework-library-reload", daemon=True,
+            ).start()
+        return _library
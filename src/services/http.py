@@ -0,0 +1,96 @@
+import logging
+import threading
+import time
+
+import httpx
+
+from config import HTTP_MAX_CONNECTIONS, HTTP_MAX_RETRIES, HTTP_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_client: httpx.Client | None = None
+_client_lock = threading.Lock()
+
+_stats = {
+    "requests": 0,
+    "retries": 0,
+    "failures": 0,
+    "bytes_downloaded": 0,
+    "seconds": 0.0,
+}
+_stats_lock = threading.Lock()
+
+
+def get_client() -> httpx.Client:
+    """Shared, thread-safe client with keep-alive connection pooling.
+
+    httpx negotiates gzip/deflate (and brotli when installed) and decodes it transparently.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = httpx.Client(
+                    timeout=HTTP_TIMEOUT,
+                    limits=httpx.Limits(
+                        max_connections=HTTP_MAX_CONNECTIONS,
+                        max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+                    ),
+                    follow_redirects=True,
+                )
+    return _client
+
+
+def _record(**deltas: float) -> None:
+    with _stats_lock:
+        for key, delta in deltas.items():
+            _stats[key] += delta
+
+
+def get_json(url: str, timeout: float | None = None, max_retries: int = HTTP_MAX_RETRIES):
+    """GET a JSON document, retrying transport errors and 429/5xx with exponential backoff."""
+    client = get_client()
+
+    for attempt in range(max_retries + 1):
+        start = time.perf_counter()
+        try:
+            response = client.get(url, timeout=timeout or HTTP_TIMEOUT)
+        except httpx.TransportError as exc:
+            _record(requests=1, seconds=time.perf_counter() - start)
+            error: Exception = exc
+        else:
+            _record(
+                requests=1,
+                bytes_downloaded=response.num_bytes_downloaded,
+                seconds=time.perf_counter() - start,
+            )
+            if response.status_code not in RETRY_STATUS_CODES:
+                if response.is_error:
+                    _record(failures=1)
+                response.raise_for_status()
+                return response.json()
+            error = httpx.HTTPStatusError(
+                f"Server returned {response.status_code} for {url}",
+                request=response.request,
+                response=response,
+            )
+
+        if attempt == max_retries:
+            _record(failures=1)
+            raise error
+        _record(retries=1)
+        delay = 0.5 * 2**attempt
+        logger.debug("GET %s failed (%s), retrying in %.1fs", url, error, delay)
+        time.sleep(delay)
+
+
+def get_stats() -> dict:
+    """Snapshot of the session's throughput counters."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["bytes_per_second"] = (
+        stats["bytes_downloaded"] / stats["seconds"] if stats["seconds"] else 0.0
+    )
+    return stats
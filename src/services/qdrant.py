@@ -1,140 +1,605 @@
 import logging
+import threading
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
+import numpy as np
 from qdrant_client import QdrantClient, models
 
-from config import EMBEDDING_DIMENSIONS, QDRANT_API_KEY, QDRANT_URL
+from config import (
+    EMBEDDING_DIMENSIONS,
+    QDRANT_ACCOUNT_PROFILE,
+    QDRANT_API_KEY,
+    QDRANT_FRAMEWORKS_PROFILE,
+    QDRANT_GRPC_PORT,
+    QDRANT_PATH,
+    QDRANT_PREFER_GRPC,
+    QDRANT_QUANTIZATION_OVERSAMPLING,
+    QDRANT_UPSERT_BATCH_SIZE,
+    QDRANT_UPSERT_PARALLELISM,
+    QDRANT_URL,
+)
 
 logger = logging.getLogger(__name__)
 
+# "default": float32 vectors and payloads in RAM, Qdrant's default HNSW graph.
+# "compact": int8 scalar-quantized copy in RAM for the first pass (rescored against
+# the float32 originals), originals and payloads on disk, sparser HNSW graph. Meant
+# for per-account collections, which are small and searched a few times per run.
+STORAGE_PROFILES = {
+    "default": {
+        "quantization": False,
+        "on_disk_vectors": False,
+        "on_disk_payload": False,
+        "hnsw_m": 16,
+        "hnsw_ef_construct": 100,
+    },
+    "compact": {
+        "quantization": True,
+        "on_disk_vectors": True,
+        "on_disk_payload": True,
+        "hnsw_m": 8,
+        "hnsw_ef_construct": 64,
+    },
+}
+
+# Ignored by collections without quantization
+_SEARCH_PARAMS = models.SearchParams(
+    quantization=models.QuantizationSearchParams(
+        rescore=True,
+        oversampling=QDRANT_QUANTIZATION_OVERSAMPLING,
+    ),
+)
+
 _client: QdrantClient | None = None
 
+# Schema registry: collections and (collection, field) payload indexes confirmed to
+# exist by this process, so ensure_* calls skip the round trip. Entries are dropped
+# whenever an operation on the collection fails.
+_known_collections: set[str] = set()
+_known_indexes: set[tuple[str, str]] = set()
+_schema_lock = threading.Lock()
+
+
+def _search_params() -> models.SearchParams | None:
+    # Embedded mode always searches exactly and warns about any search params
+    return None if is_embedded() else _SEARCH_PARAMS
+
+
+def is_embedded() -> bool:
+    """True when Qdrant runs in-process (QDRANT_PATH) rather than as a server.
+
+    Embedded mode does exact search, has no payload indexes, quantization or HNSW,
+    and its client must not be used from several threads at once.
+    """
+    return bool(QDRANT_PATH)
+
 
 def get_client() -> QdrantClient:
     global _client
+    if _client is None and is_embedded():
+        logger.info("Using embedded Qdrant at %s", QDRANT_PATH)
+        if QDRANT_PATH == ":memory:":
+            _client = QdrantClient(location=":memory:")
+        else:
+            _client = QdrantClient(path=QDRANT_PATH)
     if _client is None:
         if not QDRANT_URL:
             raise ValueError("QDRANT_URL is not set. Add it to your .env file.")
-        _client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY or None)
+        _client = QdrantClient(
+            url=QDRANT_URL,
+            api_key=QDRANT_API_KEY or None,
+            prefer_grpc=QDRANT_PREFER_GRPC,
+            grpc_port=QDRANT_GRPC_PORT,
+        )
     return _client
 
 
-def ensure_collection(collection_name: str, vector_size: int = EMBEDDING_DIMENSIONS) -> None:
-    client = get_client()
+def invalidate_schema(collection_name: str | None = None) -> None:
+    """Forget what the schema registry knows about one collection, or all of them."""
+    with _schema_lock:
+        if collection_name is None:
+            _known_collections.clear()
+            _known_indexes.clear()
+            return
+        _known_collections.discard(collection_name)
+        _known_indexes.difference_update({key for key in _known_indexes if key[0] == collection_name})
+
+
+@contextmanager
+def _invalidate_on_error(collection_name: str) -> Iterator[None]:
+    try:
+        yield
+    except Exception:
+        invalidate_schema(collection_name)
+        raise
+
+
+def collection_exists(collection_name: str) -> bool:
+    with _schema_lock:
+        if collection_name in _known_collections:
+            return True
+    if not get_client().collection_exists(collection_name):
+        return False
+    with _schema_lock:
+        _known_collections.add(collection_name)
+    return True
+
 
-    collections = [c.name for c in client.get_collections().collections]
-    if collection_name in collections:
-        logger.info("Collection '%s' already exists", collection_name)
+def _get_profile(profile: str) -> dict:
+    if profile not in STORAGE_PROFILES:
+        raise ValueError(
+            f"Unknown storage profile '{profile}'. Available: {', '.join(STORAGE_PROFILES)}"
+        )
+    return STORAGE_PROFILES[profile]
+
+
+def _quantization_config(settings: dict) -> models.ScalarQuantization | None:
+    if not settings["quantization"]:
+        return None
+    return models.ScalarQuantization(
+        scalar=models.ScalarQuantizationConfig(
+            type=models.ScalarType.INT8,
+            quantile=0.99,
+            always_ram=True,
+        ),
+    )
+
+
+def ensure_collection(
+    collection_name: str,
+    vector_size: int = EMBEDDING_DIMENSIONS,
+    profile: str = QDRANT_ACCOUNT_PROFILE,
+) -> None:
+    if collection_exists(collection_name):
+        logger.debug("Collection '%s' already exists", collection_name)
         return
 
-    client.create_collection(
+    settings = _get_profile(profile)
+    get_client().create_collection(
         collection_name=collection_name,
         vectors_config=models.VectorParams(
             size=vector_size,
             distance=models.Distance.COSINE,
+            on_disk=settings["on_disk_vectors"],
+        ),
+        on_disk_payload=settings["on_disk_payload"],
+        hnsw_config=models.HnswConfigDiff(
+            m=settings["hnsw_m"],
+            ef_construct=settings["hnsw_ef_construct"],
+        ),
+        quantization_config=_quantization_config(settings),
+    )
+    with _schema_lock:
+        _known_collections.add(collection_name)
+    logger.info("Created collection '%s' with storage profile '%s'", collection_name, profile)
+
+
+def apply_storage_profile(collection_name: str, profile: str) -> None:
+    """Migrate an existing collection to ``profile`` in place.
+
+    Qdrant rebuilds quantized vectors, the HNSW graph and on-disk storage in the
+    background; the collection stays searchable meanwhile.
+    """
+    settings = _get_profile(profile)
+    if is_embedded():
+        logger.info("Embedded Qdrant has no storage profiles, leaving '%s' as is", collection_name)
+        return
+    client = get_client()
+    client.update_collection(
+        collection_name=collection_name,
+        vectors_config={"": models.VectorParamsDiff(on_disk=settings["on_disk_vectors"])},
+        collection_params=models.CollectionParamsDiff(on_disk_payload=settings["on_disk_payload"]),
+        hnsw_config=models.HnswConfigDiff(
+            m=settings["hnsw_m"],
+            ef_construct=settings["hnsw_ef_construct"],
         ),
+        quantization_config=_quantization_config(settings) or models.Disabled.DISABLED,
     )
-    logger.info("Created collection '%s'", collection_name)
+    logger.info("Applied storage profile '%s' to collection '%s'", profile, collection_name)
 
 
 def upsert_chunks(
     collection_name: str,
     chunks: list[dict],
-    embeddings: list[list[float]],
+    embeddings: np.ndarray | list[list[float]],
+    ids: list[str],
+    batch_size: int = QDRANT_UPSERT_BATCH_SIZE,
+    parallelism: int = QDRANT_UPSERT_PARALLELISM,
 ) -> None:
+    """Upsert chunks as column-oriented batches (ids, vectors, payloads).
+
+    Up to ``parallelism`` batches are in flight with wait=False; the last batch is
+    sent with wait=True once the others are acknowledged, so when this returns
+    every point has been applied and is searchable.
+    """
     client = get_client()
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if is_embedded():
+        parallelism = 1
+
+    def _send(start: int, wait: bool) -> None:
+        end = min(start + batch_size, len(chunks))
+        client.upsert(
+            collection_name=collection_name,
+            points=models.Batch(
+                ids=ids[start:end],
+                vectors=embeddings[start:end].tolist(),
+                payloads=chunks[start:end],
+            ),
+            wait=wait,
+        )
+
+    starts = list(range(0, len(chunks), batch_size))
+    if not starts:
+        return
+
+    with _invalidate_on_error(collection_name):
+        if len(starts) > 1 and parallelism > 1:
+            with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix="qdrant-upsert") as pool:
+                # list() re-raises the first failed batch
+                list(pool.map(lambda start: _send(start, wait=False), starts[:-1]))
+        else:
+            for start in starts[:-1]:
+                _send(start, wait=False)
+        # Updates are applied in order per collection, so waiting on the last one is a barrier
+        _send(starts[-1], wait=True)
+
+    logger.info("Upserted %d chunks into '%s'", len(chunks), collection_name)
+
+
+def get_payload_field(collection_name: str, field: str) -> dict[int | str, object]:
+    """Map every point id in the collection to one payload field (None if absent).
+
+    Returns {} if the collection doesn't exist. Vectors are not fetched.
+    """
+    if not collection_exists(collection_name):
+        return {}
+    client = get_client()
+
+    values: dict[int | str, object] = {}
+    offset = None
+    with _invalidate_on_error(collection_name):
+        while True:
+            points, offset = client.scroll(
+                collection_name=collection_name,
+                limit=1000,
+                offset=offset,
+                with_payload=[field],
+                with_vectors=False,
+            )
+            for point in points:
+                values[point.id] = (point.payload or {}).get(field)
+            if offset is None:
+                return values
 
-    points = []
-    for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-        points.append(models.PointStruct(
-            id=i,
-            vector=embedding,
-            payload=chunk,
-        ))
 
+def load_points(collection_name: str, page_size: int = 1000) -> tuple[list[dict], np.ndarray]:
+    """Read every point's payload and vector, for searching the collection in memory.
+
+    Vectors come back as a row-normalized float32 matrix in payload order. Returns
+    no points if the collection doesn't exist.
+    """
+    payloads: list[dict] = []
+    vectors: list[list[float]] = []
+    if collection_exists(collection_name):
+        client = get_client()
+        offset = None
+        with _invalidate_on_error(collection_name):
+            while True:
+                points, offset = client.scroll(
+                    collection_name=collection_name,
+                    limit=page_size,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True,
+                )
+                for point in points:
+                    payloads.append(point.payload or {})
+                    vectors.append(point.vector)
+                if offset is None:
+                    break
+
+    if not vectors:
+        return payloads, np.empty((0, EMBEDDING_DIMENSIONS), dtype=np.float32)
+    return payloads, _normalize_rows(np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1))
+
+
+def overwrite_payloads(collection_name: str, payloads: dict[str, dict]) -> None:
+    """Replace the payload of existing points without touching their vectors."""
+    if not payloads:
+        return
+    client = get_client()
+    operations = [
+        models.OverwritePayloadOperation(
+            overwrite_payload=models.SetPayload(payload=payload, points=[point_id]),
+        )
+        for point_id, payload in payloads.items()
+    ]
     batch_size = 100
-    for start in range(0, len(points), batch_size):
-        batch = points[start : start + batch_size]
-        client.upsert(collection_name=collection_name, points=batch)
+    with _invalidate_on_error(collection_name):
+        for start in range(0, len(operations), batch_size):
+            client.batch_update_points(
+                collection_name=collection_name,
+                update_operations=operations[start : start + batch_size],
+            )
+    logger.info("Updated payload of %d chunks in '%s'", len(payloads), collection_name)
+
 
-    logger.info("Upserted %d chunks into '%s'", len(points), collection_name)
+def delete_points(collection_name: str, ids: list[int | str]) -> None:
+    if not ids:
+        return
+    client = get_client()
+    batch_size = 1000
+    with _invalidate_on_error(collection_name):
+        for start in range(0, len(ids), batch_size):
+            client.delete(
+                collection_name=collection_name,
+                points_selector=models.PointIdsList(points=ids[start : start + batch_size]),
+            )
+    logger.info("Deleted %d chunks from '%s'", len(ids), collection_name)
 
 
 def ensure_viral_frameworks_collection() -> None:
-    ensure_collection("viral_frameworks")
+    ensure_collection("viral_frameworks", profile=QDRANT_FRAMEWORKS_PROFILE)
+    if is_embedded():
+        return  # filters scan every point in embedded mode, indexes have no effect
+    ensure_payload_indexes(
+        "viral_frameworks",
+        ("metadata.objetivo", "metadata.plataforma", "metadata.tono_predominante"),
+    )
+
+
+def ensure_payload_indexes(collection_name: str, fields: tuple[str, ...]) -> None:
+    """Create missing keyword payload indexes, checking the collection's schema once."""
+    with _schema_lock:
+        missing = [field for field in fields if (collection_name, field) not in _known_indexes]
+    if not missing:
+        return
+
     client = get_client()
-    for field in ("metadata.objetivo", "metadata.plataforma", "metadata.tono_predominante"):
-        client.create_payload_index(
-            collection_name="viral_frameworks",
-            field_name=field,
-            field_schema=models.PayloadSchemaType.KEYWORD,
-        )
-    logger.info("Payload indexes ensured on viral_frameworks collection")
+    with _invalidate_on_error(collection_name):
+        existing = client.get_collection(collection_name).payload_schema
+        for field in missing:
+            if field not in existing:
+                client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name=field,
+                    field_schema=models.PayloadSchemaType.KEYWORD,
+                )
+                logger.info("Created payload index '%s' on '%s'", field, collection_name)
+
+    with _schema_lock:
+        _known_indexes.update((collection_name, field) for field in missing)
 
 
 def upsert_viral_framework(framework: dict, embedding: list[float], point_id: str) -> None:
     client = get_client()
     point = models.PointStruct(id=point_id, vector=embedding, payload=framework)
-    client.upsert(collection_name="viral_frameworks", points=[point])
+    with _invalidate_on_error("viral_frameworks"):
+        client.upsert(collection_name="viral_frameworks", points=[point])
     logger.info("Upserted viral framework '%s'", point_id)
 
 
-def search_viral_frameworks(
-    query_embedding: list[float],
-    objetivo: str,
-    plataforma: str,
-    tono: str | None = None,
-    limit: int = 2,
+def _payload_selector(
+    include: list[str] | None,
+    exclude: list[str] | None,
+) -> bool | models.PayloadSelector:
+    """Payload projection for a request; dotted paths select nested fields."""
+    if include is not None:
+        return models.PayloadSelectorInclude(include=include)
+    if exclude is not None:
+        return models.PayloadSelectorExclude(exclude=exclude)
+    return True
+
+
+def project_payload(payload: dict, include: list[str] | None, exclude: list[str] | None) -> dict:
+    """Apply the same projection as ``_payload_selector`` to an in-memory payload."""
+    if include is None and exclude is None:
+        return payload
+
+    if include is not None:
+        projected: dict = {}
+        for path in include:
+            *parents, leaf = path.split(".")
+            source, target = payload, projected
+            for key in parents:
+                source = source.get(key) if isinstance(source, dict) else None
+                if not isinstance(source, dict):
+                    break
+                target = target.setdefault(key, {})
+            else:
+                if leaf in source:
+                    target[leaf] = source[leaf]
+        return projected
+
+    projected = dict(payload)
+    for path in exclude:
+        *parents, leaf = path.split(".")
+        target = projected
+        for key in parents:
+            if not isinstance(target.get(key), dict):
+                break
+            nested = dict(target[key])  # copy, the caller's payload is left untouched
+            target[key] = nested
+            target = nested
+        else:
+            target.pop(leaf, None)
+    return projected
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    return matrix
+
+
+def local_scores(query_embeddings: list[list[float]], vectors: np.ndarray) -> np.ndarray:
+    """Cosine score of every query against every row of a ``load_points`` matrix."""
+    return _normalize_rows(np.asarray(query_embeddings, dtype=np.float32)) @ vectors.T
+
+
+def local_top_hits(
+    query_scores: np.ndarray,
+    rows: np.ndarray,
+    limit: int,
+    payloads: list[dict],
+    include: list[str] | None = None,
+    exclude: list[str] | None = None,
+    vectors: np.ndarray | None = None,
 ) -> list[dict]:
-    """Query viral_frameworks filtered by objetivo + plataforma (+ optional tono).
-    Falls back to objetivo+plataforma only if the tone filter returns no results.
-    Returns [] gracefully if the collection doesn't exist yet.
+    """The ``limit`` best of ``rows`` for one query, in the same shape as a Qdrant hit.
+
+    Highest score first, ties in row order. Pass ``vectors`` to include each hit's vector.
     """
-    client = get_client()
+    if len(rows) > limit:
+        rows = rows[np.argpartition(-query_scores[rows], limit - 1)[:limit]]
+    rows = rows[np.argsort(-query_scores[rows], kind="stable")]
+    hits = []
+    for row in rows:
+        hit = {"score": float(query_scores[row]), **project_payload(payloads[row], include, exclude)}
+        if vectors is not None:
+            hit["vector"] = vectors[row].tolist()
+        hits.append(hit)
+    return hits
 
-    base_conditions = [
+
+def _hit(point: models.ScoredPoint, with_vectors: bool) -> dict:
+    hit = {"score": point.score, **(point.payload or {})}
+    if with_vectors:
+        hit["vector"] = point.vector
+    return hit
+
+
+def _viral_framework_filter(objetivo: str, plataforma: str, tono: str | None) -> models.Filter:
+    conditions = [
         models.FieldCondition(key="metadata.objetivo", match=models.MatchValue(value=objetivo)),
         models.FieldCondition(key="metadata.plataforma", match=models.MatchValue(value=plataforma)),
     ]
+    if tono:
+        conditions.append(models.FieldCondition(
+            key="metadata.tono_predominante",
+            match=models.MatchValue(value=tono),
+        ))
+    return models.Filter(must=conditions)
 
-    def _run(conditions: list) -> list[dict]:
-        results = client.query_points(
+
+def search_viral_frameworks_batch(
+    query_embeddings: list[list[float]],
+    facets: list[tuple[str, str, str | None]],
+    limit: int = 2,
+    strict: bool = False,
+    include: list[str] | None = None,
+    exclude: list[str] | None = None,
+    with_vectors: bool = False,
+) -> list[list[dict]]:
+    """Batched search_viral_frameworks: one (objetivo, plataforma, tono) facet per query.
+
+    Sends every query in one request, plus at most one more request holding the
+    tone-less fallbacks for queries whose tone filter returned nothing.
+    Returns empty result lists gracefully if the collection doesn't exist yet,
+    unless ``strict`` is set, in which case errors are raised.
+    ``include``/``exclude`` project the returned payload (dotted paths allowed).
+    """
+    client = get_client()
+    with_payload = _payload_selector(include, exclude)
+
+    def _run(indexes: list[int], with_tone: bool) -> list[list[dict]]:
+        responses = client.query_batch_points(
             collection_name="viral_frameworks",
-            query=query_embedding,
-            query_filter=models.Filter(must=conditions),
-            limit=limit,
+            requests=[
+                models.QueryRequest(
+                    query=query_embeddings[i],
+                    filter=_viral_framework_filter(
+                        facets[i][0], facets[i][1], facets[i][2] if with_tone else None,
+                    ),
+                    limit=limit,
+                    with_payload=with_payload,
+                    with_vector=with_vectors,
+                    params=_search_params(),
+                )
+                for i in indexes
+            ],
         )
-        return [{"score": p.score, **p.payload} for p in results.points]
+        return [[_hit(p, with_vectors) for p in r.points] for r in responses]
 
+    results: list[list[dict]] = [[] for _ in query_embeddings]
     try:
-        if tono:
-            results = _run(base_conditions + [
-                models.FieldCondition(
-                    key="metadata.tono_predominante",
-                    match=models.MatchValue(value=tono),
-                )
-            ])
-            if results:
-                return results
-        return _run(base_conditions)
+        first_pass = list(range(len(query_embeddings)))
+        for i, hits in zip(first_pass, _run(first_pass, with_tone=True)):
+            results[i] = hits
+
+        fallback = [i for i in first_pass if facets[i][2] and not results[i]]
+        if fallback:
+            for i, hits in zip(fallback, _run(fallback, with_tone=False)):
+                results[i] = hits
     except Exception as exc:
+        invalidate_schema("viral_frameworks")
+        if strict:
+            raise
         logger.warning("viral_frameworks search failed (%s), skipping", exc)
-        return []
+        return [[] for _ in query_embeddings]
+
+    return results
+
+
+def search_viral_frameworks(
+    query_embedding: list[float],
+    objetivo: str,
+    plataforma: str,
+    tono: str | None = None,
+    limit: int = 2,
+) -> list[dict]:
+    """Query viral_frameworks filtered by objetivo + plataforma (+ optional tono).
+    Falls back to objetivo+plataforma only if the tone filter returns no results.
+    Returns [] gracefully if the collection doesn't exist yet.
+    """
+    return search_viral_frameworks_batch([query_embedding], [(objetivo, plataforma, tono)], limit)[0]
 
 
 def search(
     collection_name: str,
     query_embedding: list[float],
     limit: int = 10,
+    include: list[str] | None = None,
+    exclude: list[str] | None = None,
+    with_vectors: bool = False,
 ) -> list[dict]:
+    return search_batch(collection_name, [query_embedding], limit, include, exclude, with_vectors)[0]
+
+
+def search_batch(
+    collection_name: str,
+    query_embeddings: list[list[float]],
+    limit: int = 10,
+    include: list[str] | None = None,
+    exclude: list[str] | None = None,
+    with_vectors: bool = False,
+) -> list[list[dict]]:
+    """Run several searches against one collection in a single request.
+
+    ``include``/``exclude`` project the returned payload (dotted paths allowed);
+    only the requested fields are transferred and decoded.
+    """
+    if not query_embeddings:
+        return []
+
     client = get_client()
+    with_payload = _payload_selector(include, exclude)
 
-    results = client.query_points(
-        collection_name=collection_name,
-        query=query_embedding,
-        limit=limit,
-    )
+    with _invalidate_on_error(collection_name):
+        responses = client.query_batch_points(
+            collection_name=collection_name,
+            requests=[
+                models.QueryRequest(
+                    query=embedding,
+                    limit=limit,
+                    with_payload=with_payload,
+                    with_vector=with_vectors,
+                    params=_search_params(),
+                )
+                for embedding in query_embeddings
+            ],
+        )
 
-    return [
-        {"score": point.score, **point.payload}
-        for point in results.points
-    ]
+    return [[_hit(point, with_vectors) for point in response.points] for response in responses]
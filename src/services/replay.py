@@ -0,0 +1,104 @@
+import hashlib
+import json
+import logging
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from config import EXTRACTION_FIXTURES_DIR, EXTRACTION_REPLAY_LATENCY_MS, EXTRACTION_REPLAY_MODE
+
+logger = logging.getLogger(__name__)
+
+MODES = ("off", "record", "replay")
+# Kinds recorded by the extraction services; a latency for "ytdlp" covers both yt-dlp kinds
+KINDS = ("ytdlp_channel", "ytdlp_video", "caption", "apify")
+_LATENCY_KEYS = {"*", *KINDS, *(kind.partition("_")[0] for kind in KINDS)}
+
+if EXTRACTION_REPLAY_MODE not in MODES:
+    raise ValueError(f"EXTRACTION_REPLAY_MODE must be one of {MODES}, got '{EXTRACTION_REPLAY_MODE}'")
+
+
+def _parse_latency(spec: str) -> dict[str, float]:
+    """Parse "250" or "ytdlp=800,caption=40" into seconds per kind ("*" = default)."""
+    latencies: dict[str, float] = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        kind, _, value = part.rpartition("=")
+        kind = kind.strip() or "*"
+        if kind not in _LATENCY_KEYS:
+            raise ValueError(f"Unknown replay latency kind '{kind}', expected one of {sorted(_LATENCY_KEYS)}")
+        latencies[kind] = float(value) / 1000
+    return latencies
+
+
+def _latency(kind: str) -> float:
+    for key in (kind, kind.partition("_")[0], "*"):
+        if key in _latencies:
+            return _latencies[key]
+    return 0.0
+
+
+_mode = EXTRACTION_REPLAY_MODE
+_fixtures_dir = Path(EXTRACTION_FIXTURES_DIR)
+_latencies = _parse_latency(EXTRACTION_REPLAY_LATENCY_MS)
+
+
+def configure(
+    mode: str | None = None,
+    fixtures_dir: str | None = None,
+    latency_ms: str | None = None,
+) -> None:
+    """Override the environment settings at runtime (e.g. from a benchmark script)."""
+    global _mode, _fixtures_dir, _latencies
+    if mode is not None:
+        if mode not in MODES:
+            raise ValueError(f"Replay mode must be one of {MODES}, got '{mode}'")
+        _mode = mode
+    if fixtures_dir is not None:
+        _fixtures_dir = Path(fixtures_dir)
+    if latency_ms is not None:
+        _latencies = _parse_latency(latency_ms)
+
+
+def is_replaying() -> bool:
+    return _mode == "replay"
+
+
+def is_recording() -> bool:
+    return _mode == "record"
+
+
+def _fixture_path(kind: str, key: str) -> Path:
+    digest = hashlib.sha1(key.encode()).hexdigest()[:20]
+    return _fixtures_dir / kind / f"{digest}.json"
+
+
+def recorded(kind: str, key: str, fetch: Callable[[], Any]) -> Any:
+    """Return ``fetch()``, recording or replaying it under (kind, key) depending on the mode.
+
+    "record" writes the raw response to EXTRACTION_FIXTURES_DIR (``fetch`` must then
+    return JSON-serializable data); "replay" serves it back without touching the
+    network after sleeping the configured latency. Disable the YouTube cache when
+    benchmarking so every call reaches this layer.
+    """
+    if _mode == "off":
+        return fetch()
+
+    path = _fixture_path(kind, key)
+
+    if _mode == "replay":
+        if not path.exists():
+            raise FileNotFoundError(f"No recorded {kind} fixture for {key} ({path})")
+        delay = _latency(kind)
+        if delay:
+            time.sleep(delay)
+        return json.loads(path.read_text(encoding="utf-8"))["data"]
+
+    data = fetch()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"kind": kind, "key": key, "data": data}), encoding="utf-8")
+    logger.debug("Recorded %s fixture for %s", kind, key)
+    return data
@@ -0,0 +1,112 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from config import LOCAL_SEARCH_MAX_COLLECTIONS, LOCAL_SEARCH_MAX_POINTS, LOCAL_SEARCH_SNAPSHOT_TTL
+from services import qdrant
+from services.qdrant import local_scores, local_top_hits
+
+logger = logging.getLogger(__name__)
+
+
+class CollectionSnapshot:
+    """In-memory copy of a small collection: normalized float32 vectors plus payloads."""
+
+    def __init__(self, collection_name: str, payloads: list[dict], vectors: np.ndarray):
+        self.collection_name = collection_name
+        self.payloads = payloads
+        self.vectors = vectors
+
+    def __len__(self) -> int:
+        return len(self.payloads)
+
+    def search_batch(
+        self,
+        query_embeddings: list[list[float]],
+        limit: int = 10,
+        include: list[str] | None = None,
+        exclude: list[str] | None = None,
+        with_vectors: bool = False,
+    ) -> list[list[dict]]:
+        """Exact cosine top-k for each query, same result shape as ``qdrant.search_batch``."""
+        if not query_embeddings:
+            return []
+        if not len(self):
+            return [[] for _ in query_embeddings]
+
+        scores = local_scores(query_embeddings, self.vectors)
+        rows = np.arange(len(self))
+        vectors = self.vectors if with_vectors else None
+        return [
+            local_top_hits(query_scores, rows, limit, self.payloads, include, exclude, vectors)
+            for query_scores in scores
+        ]
+
+
+def load_snapshot(collection_name: str) -> CollectionSnapshot:
+    payloads, vectors = qdrant.load_points(collection_name)
+    return CollectionSnapshot(collection_name, payloads, vectors)
+
+
+# Per-collection (loaded at, choice): a snapshot to search locally, or None for
+# "too big, use Qdrant". Entries expire after LOCAL_SEARCH_SNAPSHOT_TTL seconds.
+_snapshots: OrderedDict[str, tuple[float, CollectionSnapshot | None]] = OrderedDict()
+_lock = threading.Lock()
+
+
+def _get_snapshot(collection_name: str) -> CollectionSnapshot | None:
+    with _lock:
+        entry = _snapshots.get(collection_name)
+        if entry is not None and time.monotonic() - entry[0] <= LOCAL_SEARCH_SNAPSHOT_TTL:
+            _snapshots.move_to_end(collection_name)
+            return entry[1]
+
+    loaded_at = time.monotonic()
+    points = qdrant.get_client().count(collection_name, exact=False).count
+    snapshot = None
+    if points <= LOCAL_SEARCH_MAX_POINTS:
+        snapshot = load_snapshot(collection_name)
+        logger.info("Searching '%s' locally (%d points in memory)", collection_name, len(snapshot))
+    else:
+        logger.info(
+            "Collection '%s' has ~%d points (> %d), searching it in Qdrant",
+            collection_name, points, LOCAL_SEARCH_MAX_POINTS,
+        )
+
+    with _lock:
+        _snapshots[collection_name] = (loaded_at, snapshot)
+        _snapshots.move_to_end(collection_name)
+        while len(_snapshots) > LOCAL_SEARCH_MAX_COLLECTIONS:
+            _snapshots.popitem(last=False)
+    return snapshot
+
+
+def invalidate(collection_name: str) -> None:
+    """Drop the snapshot of a collection whose points changed."""
+    with _lock:
+        _snapshots.pop(collection_name, None)
+
+
+def search_batch(
+    collection_name: str,
+    query_embeddings: list[list[float]],
+    limit: int = 10,
+    include: list[str] | None = None,
+    exclude: list[str] | None = None,
+    with_vectors: bool = False,
+) -> list[list[dict]]:
+    """``qdrant.search_batch``, answered from memory for collections up to LOCAL_SEARCH_MAX_POINTS.
+
+    The first search of a small collection loads it; later ones within
+    LOCAL_SEARCH_SNAPSHOT_TTL (the rest of the pipeline run) need no round trip.
+    """
+    if not query_embeddings:
+        return []
+
+    snapshot = _get_snapshot(collection_name)
+    if snapshot is None:
+        return qdrant.search_batch(collection_name, query_embeddings, limit, include, exclude, with_vectors)
+    return snapshot.search_batch(query_embeddings, limit, include, exclude, with_vectors)
@@ -1,11 +1,26 @@
 import logging
+import re
 from datetime import datetime
+from urllib.parse import parse_qs, urlparse
 
 import yt_dlp
 
+from config import YOUTUBE_CACHE_ENABLED
+from services import http, replay, youtube_cache
+
 logger = logging.getLogger(__name__)
 
 
+def _extract_info(url: str, ydl_opts: dict, kind: str) -> dict | None:
+    def fetch() -> dict | None:
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=False)
+            # Fixtures must be plain JSON
+            return ydl.sanitize_info(info) if info and replay.is_recording() else info
+
+    return replay.recorded(kind, url, fetch)
+
+
 def get_channel_videos(channel_url: str, limit: int) -> list[dict]:
     ydl_opts = {
         "quiet": True,
@@ -14,8 +29,7 @@ def get_channel_videos(channel_url: str, limit: int) -> list[dict]:
         "playlistend": limit,
     }
 
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        info = ydl.extract_info(channel_url, download=False)
+    info = _extract_info(channel_url, ydl_opts, kind="ytdlp_channel")
 
     if not info:
         return []
@@ -37,24 +51,64 @@ def get_channel_videos(channel_url: str, limit: int) -> list[dict]:
     return videos
 
 
-def get_video_metadata(video_url: str) -> dict:
+def parse_video_id(video_url: str) -> str | None:
+    parsed = urlparse(video_url)
+    hostname = parsed.hostname or ""
+
+    if "youtu.be" in hostname:
+        return parsed.path.strip("/").split("/")[0] or None
+    if parsed.path == "/watch":
+        return parse_qs(parsed.query).get("v", [None])[0]
+    match = re.match(r"/(?:shorts|embed|live)/([\w-]+)", parsed.path)
+    return match.group(1) if match else None
+
+
+def get_video_metadata(video_url: str, timeout: float | None = None) -> dict:
+    video_id = parse_video_id(video_url)
+    cached_static, cached_counters = None, None
+    if YOUTUBE_CACHE_ENABLED and video_id:
+        cached_static, cached_counters = youtube_cache.lookup(video_id)
+        if cached_static is not None and cached_counters is not None:
+            return {**cached_static, **cached_counters}
+
     ydl_opts = {
         "quiet": True,
         "no_warnings": True,
         "skip_download": True,
-        "writesubtitles": True,
-        "writeautomaticsub": True,
-        "subtitleslangs": ["es", "en"],
-        "subtitlesformat": "json3",
     }
+    if cached_static is None:
+        ydl_opts.update({
+            "writesubtitles": True,
+            "writeautomaticsub": True,
+            "subtitleslangs": ["es", "en"],
+            "subtitlesformat": "json3",
+        })
+    if timeout:
+        ydl_opts["socket_timeout"] = timeout
 
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        info = ydl.extract_info(video_url, download=False)
+    info = _extract_info(video_url, ydl_opts, kind="ytdlp_video")
 
     if not info:
         return {}
 
-    transcript = _extract_transcript(info)
+    counters = {
+        "views": info.get("view_count"),
+        "likes": info.get("like_count"),
+        "comments": info.get("comment_count"),
+    }
+
+    # Known video: title, transcript etc. never change, only the counters are refreshed
+    if cached_static is not None:
+        metadata = {**cached_static, **counters}
+        youtube_cache.store(video_id, metadata, refresh_static=False)
+        return metadata
+
+    try:
+        transcript = _extract_transcript(info, timeout)
+        transcript_failed = False
+    except Exception as exc:
+        logger.warning("Failed to download subtitles for %s: %s", video_url, exc)
+        transcript, transcript_failed = None, True
 
     upload_date = info.get("upload_date", "")
     published_at = None
@@ -64,22 +118,32 @@ def get_video_metadata(video_url: str) -> dict:
         except ValueError:
             pass
 
-    return {
+    metadata = {
         "title": info.get("title", ""),
         "description": info.get("description", ""),
         "transcript": transcript,
         "url": info.get("webpage_url", video_url),
-        "views": info.get("view_count"),
-        "likes": info.get("like_count"),
-        "comments": info.get("comment_count"),
+        **counters,
         "duration": info.get("duration"),
         "published_at": published_at,
         "channel": info.get("channel", ""),
         "channel_id": info.get("channel_id", ""),
     }
 
+    # Only a video without captions is cached as transcript-less; a failed download
+    # (rate limit, timeout) is retried on the next run
+    cache_id = info.get("id") or video_id
+    if YOUTUBE_CACHE_ENABLED and cache_id and not transcript_failed:
+        youtube_cache.store(cache_id, metadata)
+
+    return metadata
+
 
-def _extract_transcript(info: dict) -> str | None:
+def _extract_transcript(info: dict, timeout: float | None = None) -> str | None:
+    """Text of the preferred json3 caption track, None if the video has none.
+
+    Raises if the track exists but could not be downloaded.
+    """
     subtitles = info.get("subtitles", {})
     automatic_captions = info.get("automatic_captions", {})
 
@@ -88,7 +152,7 @@ def _extract_transcript(info: dict) -> str | None:
             tracks = source.get(lang, [])
             for track in tracks:
                 if track.get("ext") == "json3":
-                    return _download_subtitle_text(track["url"])
+                    return _download_subtitle_text(track["url"], timeout)
 
     for source in [subtitles, automatic_captions]:
         if source:
@@ -96,27 +160,21 @@ def _extract_transcript(info: dict) -> str | None:
             tracks = source[first_lang]
             for track in tracks:
                 if track.get("ext") == "json3":
-                    return _download_subtitle_text(track["url"])
+                    return _download_subtitle_text(track["url"], timeout)
 
     return None
 
 
-def _download_subtitle_text(subtitle_url: str) -> str | None:
-    import json
-    import urllib.request
+def _download_subtitle_text(subtitle_url: str, timeout: float | None = None) -> str | None:
+    data = replay.recorded(
+        "caption", subtitle_url, lambda: http.get_json(subtitle_url, timeout=timeout),
+    )
 
-    try:
-        with urllib.request.urlopen(subtitle_url) as response:
-            data = json.loads(response.read().decode())
-
-        segments = []
-        for event in data.get("events", []):
-            segs = event.get("segs", [])
-            text = "".join(seg.get("utf8", "") for seg in segs).strip()
-            if text and text != "\n":
-                segments.append(text)
-
-        return " ".join(segments) if segments else None
-    except Exception:
-        logger.warning("Failed to download subtitle from %s", subtitle_url)
-        return None
+    segments = []
+    for event in data.get("events", []):
+        segs = event.get("segs", [])
+        text = "".join(seg.get("utf8", "") for seg in segs).strip()
+        if text and text != "\n":
+            segments.append(text)
+
+    return " ".join(segments) if segments else None
@@ -0,0 +1,151 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from config import (
+    YOUTUBE_CACHE_COUNTERS_TTL,
+    YOUTUBE_CACHE_DB_PATH,
+    YOUTUBE_CACHE_MAX_ENTRIES,
+    YOUTUBE_CACHE_STATIC_TTL,
+)
+
+logger = logging.getLogger(__name__)
+
+# Fields that change over a video's lifetime vs. fields fixed at upload time
+COUNTER_FIELDS = ("views", "likes", "comments")
+STATIC_FIELDS = (
+    "title",
+    "description",
+    "transcript",
+    "url",
+    "duration",
+    "published_at",
+    "channel",
+    "channel_id",
+)
+
+_EVICT_EVERY_N_WRITES = 200
+
+_conn: sqlite3.Connection | None = None
+_lock = threading.Lock()
+_writes_since_evict = 0
+
+
+def _get_conn() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        db_path = Path(YOUTUBE_CACHE_DB_PATH)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        _conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        _conn.execute(
+            """CREATE TABLE IF NOT EXISTS videos (
+                video_id TEXT PRIMARY KEY,
+                static_json TEXT NOT NULL,
+                static_fetched_at REAL NOT NULL,
+                counters_json TEXT NOT NULL,
+                counters_fetched_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            )"""
+        )
+        _conn.execute("CREATE INDEX IF NOT EXISTS idx_videos_last_accessed ON videos (last_accessed)")
+        _conn.commit()
+        _evict(_conn)
+    return _conn
+
+
+def _evict(conn: sqlite3.Connection) -> None:
+    """Drop entries whose static fields expired, then the least recently used beyond the cap."""
+    now = time.time()
+    expired = conn.execute(
+        "DELETE FROM videos WHERE static_fetched_at < ?",
+        (now - YOUTUBE_CACHE_STATIC_TTL,),
+    ).rowcount
+    overflow = conn.execute(
+        """DELETE FROM videos WHERE video_id IN (
+            SELECT video_id FROM videos ORDER BY last_accessed DESC LIMIT -1 OFFSET ?
+        )""",
+        (YOUTUBE_CACHE_MAX_ENTRIES,),
+    ).rowcount
+    conn.commit()
+    if expired or overflow:
+        logger.info("YouTube cache evicted %d expired and %d LRU entries", expired, overflow)
+
+
+def _encode(fields: dict) -> str:
+    return json.dumps({
+        k: v.isoformat() if isinstance(v, datetime) else v
+        for k, v in fields.items()
+    })
+
+
+def _decode_static(raw: str) -> dict:
+    static = json.loads(raw)
+    if static.get("published_at"):
+        static["published_at"] = datetime.fromisoformat(static["published_at"])
+    return static
+
+
+def lookup(video_id: str) -> tuple[dict | None, dict | None]:
+    """Return (static_fields, counter_fields) for a video.
+
+    Either side is None when missing or past its TTL.
+    """
+    now = time.time()
+    with _lock:
+        conn = _get_conn()
+        row = conn.execute(
+            "SELECT static_json, static_fetched_at, counters_json, counters_fetched_at "
+            "FROM videos WHERE video_id = ?",
+            (video_id,),
+        ).fetchone()
+        if row is None:
+            return None, None
+        conn.execute("UPDATE videos SET last_accessed = ? WHERE video_id = ?", (now, video_id))
+        conn.commit()
+
+    static_json, static_fetched_at, counters_json, counters_fetched_at = row
+    if now - static_fetched_at > YOUTUBE_CACHE_STATIC_TTL:
+        return None, None
+
+    counters = None
+    if now - counters_fetched_at <= YOUTUBE_CACHE_COUNTERS_TTL:
+        counters = json.loads(counters_json)
+    return _decode_static(static_json), counters
+
+
+def store(video_id: str, metadata: dict, refresh_static: bool = True) -> None:
+    """Cache a video's metadata. With ``refresh_static=False`` only the counters are updated."""
+    global _writes_since_evict
+    now = time.time()
+    counters_json = _encode({k: metadata.get(k) for k in COUNTER_FIELDS})
+
+    with _lock:
+        conn = _get_conn()
+        if refresh_static:
+            conn.execute(
+                "INSERT OR REPLACE INTO videos VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    video_id,
+                    _encode({k: metadata.get(k) for k in STATIC_FIELDS}),
+                    now,
+                    counters_json,
+                    now,
+                    now,
+                ),
+            )
+        else:
+            conn.execute(
+                "UPDATE videos SET counters_json = ?, counters_fetched_at = ?, last_accessed = ? "
+                "WHERE video_id = ?",
+                (counters_json, now, now, video_id),
+            )
+        conn.commit()
+
+        _writes_since_evict += 1
+        if _writes_since_evict >= _EVICT_EVERY_N_WRITES:
+            _writes_since_evict = 0
+            _evict(conn)